@@ -0,0 +1,106 @@
+# bench/coin_ledger_stress.py
+# Concurrent-transfer stress run against the local SQLite coin ledger,
+# followed by a hot coupon drop.
+#
+#   python -m bench.coin_ledger_stress --users 50 --transfers 5000 --redeemers 2000
+#
+# Fails (exit 1) if coins are created or destroyed, a balance goes negative,
+# or the coupon is over-issued or redeemed twice by one user.
+import argparse, asyncio, os, random, sqlite3, tempfile, time
+
+from utils import db_helpers
+from utils.coin_ledger import SQLiteLedger
+
+START_BALANCE = 1000
+COUPON_VALUE = 10
+COUPON_USES = 100
+
+
+async def run(users, transfers, concurrency, redeemers):
+    ledger = SQLiteLedger()
+    await db_helpers.init_tables()
+    for user_id in range(1, users + 1):
+        await ledger.add(user_id, START_BALANCE)
+
+    sem = asyncio.Semaphore(concurrency)
+    ok = refused = 0
+
+    async def one():
+        nonlocal ok, refused
+        sender, receiver = random.sample(range(1, users + 1), 2)
+        async with sem:
+            result = await ledger.transfer(sender, receiver, random.randint(1, 300))
+        if result is None:
+            refused += 1
+        else:
+            ok += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(transfers)))
+    elapsed = time.perf_counter() - start
+
+    # also hammer a single balance with concurrent add/remove
+    results = await asyncio.gather(
+        *(ledger.add(1, 1) for _ in range(500)),
+        *(ledger.remove(1, 1) for _ in range(500))
+    )
+    net = 500 - sum(1 for r in results[500:] if r is not None)
+
+    # coupon drop: every redeemer tries twice, all at once
+    await ledger.create_coupon("DROP", COUPON_VALUE, COUPON_USES, int(time.time()) + 3600)
+    start = time.perf_counter()
+    statuses = await asyncio.gather(*(
+        ledger.redeem_coupon("DROP", users + 1 + i % redeemers, int(time.time()))
+        for i in range(redeemers * 2)
+    ))
+    redeem_elapsed = time.perf_counter() - start
+    redeemed = sum(1 for status, _, _ in statuses if status == "ok")
+    net += redeemed * COUPON_VALUE
+
+    stats = db_helpers.stats()
+    await db_helpers.close()
+    return ok, refused, elapsed, net, redeemed, redeem_elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--transfers", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--redeemers", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_helpers.DB_NAME = os.path.join(tmp, "stress.db")
+        ok, refused, elapsed, net, redeemed, redeem_elapsed, stats = asyncio.run(
+            run(args.users, args.transfers, args.concurrency, args.redeemers)
+        )
+
+        con = sqlite3.connect(db_helpers.DB_NAME)
+        total, lowest = con.execute("SELECT SUM(balance), MIN(balance) FROM coins").fetchone()
+        used = con.execute("SELECT used FROM coupons WHERE code='DROP'").fetchone()[0]
+        rows, distinct = con.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT user_id) FROM coupon_redemptions"
+        ).fetchone()
+        con.close()
+
+    expected = args.users * START_BALANCE + net
+    print(f"transfers: {ok} ok, {refused} refused in {elapsed:.2f}s "
+          f"({(ok + refused) / elapsed:.0f}/s)")
+    print(f"total coins: {total} (expected {expected}), lowest balance: {lowest}")
+    print(f"coupon drop: {redeemed}/{args.redeemers * 2} redeemed in {redeem_elapsed:.2f}s, "
+          f"used {used}/{COUPON_USES}, {rows} redemption rows")
+    print(f"group commit: {stats['writes']} writes in {stats['commits']} commits "
+          f"(avg batch {stats['avg_batch']})")
+
+    if total != expected or lowest < 0:
+        print("❌ ledger drifted")
+        raise SystemExit(1)
+    if redeemed != min(COUPON_USES, args.redeemers) or used != redeemed or rows != distinct:
+        print("❌ coupon over-issued")
+        raise SystemExit(1)
+    print("✅ ledger consistent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# bench/fake_supabase.py
+# In-memory stand-in for the slice of the supabase-py client the bot uses,
+# so harnesses can run against utils.supabase_db without a real project:
+#
+#   await db.init_db(client=FakeSupabase())
+import threading
+from types import SimpleNamespace
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.tables = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def rows(self, name):
+        return self.tables.setdefault(name, [])
+
+
+class _Query:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.op = "select"
+        self.payload = None
+        self.filters = []
+        self.orders = []
+        self.start = None
+        self.end = None
+        self.conflict = []
+        self._negate = False
+
+    # ---------- operations ----------
+    def select(self, *columns, **_):
+        self.op = "select"
+        return self
+
+    def insert(self, payload, **_):
+        self.op, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict="", **_):
+        self.op, self.payload = "upsert", payload
+        self.conflict = [c.strip() for c in on_conflict.split(",") if c.strip()]
+        return self
+
+    def update(self, payload, **_):
+        self.op, self.payload = "update", payload
+        return self
+
+    def delete(self, **_):
+        self.op = "delete"
+        return self
+
+    # ---------- filters ----------
+    def _filter(self, test):
+        if self._negate:
+            self._negate = False
+            self.filters.append(lambda r: not test(r))
+        else:
+            self.filters.append(test)
+        return self
+
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def is_(self, col, value):
+        return self._filter(lambda r: r.get(col) is None if value == "null" else r.get(col) is value)
+
+    def eq(self, col, value):
+        self.filters.append(lambda r: r.get(col) == value)
+        return self
+
+    def neq(self, col, value):
+        self.filters.append(lambda r: r.get(col) != value)
+        return self
+
+    def in_(self, col, values):
+        values = set(values)
+        self.filters.append(lambda r: r.get(col) in values)
+        return self
+
+    def lte(self, col, value):
+        self.filters.append(lambda r: r.get(col) is not None and r[col] <= value)
+        return self
+
+    def gt(self, col, value):
+        self.filters.append(lambda r: r.get(col) is not None and r[col] > value)
+        return self
+
+    def order(self, col, desc=False):
+        self.orders.append((col, desc))
+        return self
+
+    def limit(self, n):
+        self.start, self.end = 0, n - 1
+        return self
+
+    def range(self, start, end):
+        self.start, self.end = start, end
+        return self
+
+    # ---------- execute ----------
+    def _match(self, row):
+        return all(f(row) for f in self.filters)
+
+    def execute(self):
+        with self.client._lock:
+            self.client.requests += 1
+            rows = self.client.rows(self.name)
+
+            if self.op == "select":
+                data = [dict(r) for r in rows if self._match(r)]
+                for col, desc in reversed(self.orders):
+                    data.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+                if self.start is not None:
+                    data = data[self.start:self.end + 1]
+
+            elif self.op == "insert":
+                data = [dict(r) for r in _as_list(self.payload)]
+                rows.extend(dict(r) for r in data)
+
+            elif self.op == "upsert":
+                data = []
+                keys = self.conflict or [next(iter(_as_list(self.payload)[0]))]
+                for new in _as_list(self.payload):
+                    match = next((r for r in rows if all(r.get(k) == new.get(k) for k in keys)), None)
+                    if match is None:
+                        match = dict(new)
+                        rows.append(match)
+                    else:
+                        match.update(new)
+                    data.append(dict(match))
+
+            elif self.op == "update":
+                data = []
+                for r in rows:
+                    if self._match(r):
+                        r.update(self.payload)
+                        data.append(dict(r))
+
+            else:
+                data = [dict(r) for r in rows if self._match(r)]
+                rows[:] = [r for r in rows if not self._match(r)]
+
+            return SimpleNamespace(data=data)
+
+
+def _as_list(payload):
+    return payload if isinstance(payload, list) else [payload]
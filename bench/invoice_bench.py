@@ -0,0 +1,134 @@
+# bench/invoice_bench.py
+# Invoice renderer benchmark + golden-image check, using only local assets.
+#
+#   python -m bench.invoice_bench -n 200                # serial / thread / process
+#   python -m bench.invoice_bench --check-golden        # pixel-diff vs bench/golden
+#   python -m bench.invoice_bench --update-golden       # after an intended visual change
+import argparse, os, resource, statistics, time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageChops
+
+from utils.invoice import load_template, render_invoice, PNG_COMPRESS_LEVEL
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "golden", "invoice.png")
+GOLDEN_ARGS = ("GoldenUser", 250, 750, "PSG-00000", "01-01-2026 12:00")
+
+
+# ===============================
+# BENCHMARK
+# ===============================
+def _timed_render(i, compress_level):
+    start = time.perf_counter()
+    render_invoice(f"user{i}", 100 + i, 300 + i, f"PSG-{i:05d}", "01-01-2026 12:00", compress_level)
+    # measured in whichever process rendered it, so pool workers report
+    # their own peak instead of relying on RUSAGE_CHILDREN (reaped only)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return time.perf_counter() - start, os.getpid(), peak
+
+
+def _report(name, results, wall):
+    latencies = sorted(r[0] for r in results)
+    q = statistics.quantiles(latencies, n=100)
+
+    peaks = {}
+    for _, pid, peak in results:
+        peaks[pid] = max(peaks.get(pid, 0), peak)
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers = [peak for pid, peak in peaks.items() if pid != os.getpid()]
+    memory = f"peak rss {own / 1024:.0f} MiB"   # ru_maxrss is KiB on Linux
+    if workers:
+        memory += f" (workers max {max(workers) / 1024:.0f} MiB x {len(workers)})"
+
+    print(
+        f"{name:<8} n={len(latencies):<5} "
+        f"p50={q[49] * 1000:7.1f}ms p90={q[89] * 1000:7.1f}ms p99={q[98] * 1000:7.1f}ms "
+        f"{len(latencies) / wall:7.1f} img/s  {memory}"
+    )
+
+
+def run_bench(n, workers, compress_level):
+    load_template()
+
+    start = time.perf_counter()
+    results = [_timed_render(i, compress_level) for i in range(n)]
+    _report("serial", results, time.perf_counter() - start)
+
+    with ThreadPoolExecutor(workers) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(_timed_render, range(n), [compress_level] * n))
+        _report("thread", results, time.perf_counter() - start)
+
+    with ProcessPoolExecutor(workers, initializer=load_template) as pool:
+        # warm-up so worker start-up isn't counted
+        list(pool.map(_timed_render, range(workers), [compress_level] * workers))
+        start = time.perf_counter()
+        results = list(pool.map(_timed_render, range(n), [compress_level] * n))
+        _report("process", results, time.perf_counter() - start)
+
+
+# ===============================
+# GOLDEN IMAGE
+# ===============================
+def _decode(png):
+    return Image.open(BytesIO(png)).convert("RGB")
+
+
+def update_golden():
+    os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+    with open(GOLDEN_PATH, "wb") as f:
+        f.write(render_invoice(*GOLDEN_ARGS, compress_level=9))
+    print(f"✅ Golden image written: {GOLDEN_PATH}")
+
+
+def check_golden(levels, max_diff):
+    if not os.path.exists(GOLDEN_PATH):
+        raise SystemExit("❌ No golden image, run with --update-golden first")
+
+    with Image.open(GOLDEN_PATH) as img:
+        golden = img.convert("RGB")
+
+    failed = False
+    for level in levels:
+        png = render_invoice(*GOLDEN_ARGS, compress_level=level)
+        img = _decode(png)
+        if img.size != golden.size:
+            changed = golden.width * golden.height
+        else:
+            diff = ImageChops.difference(golden, img)
+            mask = diff.point(lambda v: 255 if v else 0).convert("L")
+            changed = golden.width * golden.height - mask.histogram()[0]
+        ratio = changed / (golden.width * golden.height)
+
+        ok = ratio <= max_diff
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} compress_level={level}: {changed} px differ "
+              f"({ratio:.4%}), {len(png) // 1024} KB")
+
+    if failed:
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=100, help="invoices per mode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--compress-level", type=int, default=PNG_COMPRESS_LEVEL)
+    parser.add_argument("--check-golden", action="store_true")
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument("--levels", default="0,1,6,9", help="compress levels to check")
+    parser.add_argument("--max-diff", type=float, default=0.0,
+                        help="allowed fraction of differing pixels")
+    args = parser.parse_args()
+
+    if args.update_golden:
+        update_golden()
+    elif args.check_golden:
+        check_golden([int(x) for x in args.levels.split(",")], args.max_diff)
+    else:
+        run_bench(args.n, args.workers, args.compress_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# bench/payment_replay.py
+# Runs /confirm_payment twice for the same UPI reference through the command
+# callback, against the local SQLite coin ledger.
+#
+#   python -m bench.payment_replay
+#
+# Fails (exit 1) if the member is credited twice, or if a different
+# reference for the same member is refused.
+import asyncio, os, tempfile
+
+from utils import coin_ledger, db_helpers
+from utils.render import shutdown_render_pool
+from cogs.payment import Payment, RUPEE_RATE, COINS_PER_RATE
+
+RUPEES = 100
+COINS = (RUPEES // RUPEE_RATE) * COINS_PER_RATE
+
+
+class FakeResponse:
+    async def defer(self, **kwargs):
+        pass
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content=None, **kwargs):
+        self.messages.append(content)
+
+
+class FakeChannel:
+    def __init__(self):
+        self.files = 0
+
+    async def send(self, content=None, file=None, **kwargs):
+        self.files += file is not None
+
+
+class FakeInteraction:
+    # a fresh id per run, like a second /confirm_payment by an admin
+    def __init__(self, interaction_id, channel):
+        self.id = interaction_id
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+        self.channel = channel
+
+
+class FakeMember:
+    id = 4242
+    name = "ReplayUser"
+    mention = "<@4242>"
+
+    async def send(self, *args, **kwargs):
+        pass
+
+
+async def run():
+    cog = Payment(bot=None)
+    member, channel = FakeMember(), FakeChannel()
+
+    async def confirm(interaction_id, reference):
+        interaction = FakeInteraction(interaction_id, channel)
+        await Payment.confirm_payment.callback(cog, interaction, member, RUPEES, reference)
+        return interaction.followup.messages[-1]
+
+    first = await confirm(1001, "UTR 4101 2345 6789")
+    replay = await confirm(1002, "utr410123456789")
+    other = await confirm(1003, "UTR999988887777")
+    balance = await db_helpers.get_coins(member.id)
+
+    await db_helpers.close()
+    return first, replay, other, balance, channel.files
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_helpers.DB_NAME = os.path.join(tmp, "replay.db")
+        coin_ledger.COIN_BACKEND = "sqlite"
+        try:
+            first, replay, other, balance, invoices = asyncio.run(run())
+        finally:
+            shutdown_render_pool()
+
+    print(f"first:  {first}")
+    print(f"replay: {replay}")
+    print(f"other:  {other}")
+    print(f"balance: {balance} (expected {COINS * 2}), invoices sent: {invoices}")
+
+    if balance != COINS * 2 or invoices != 2 or "already confirmed" not in replay:
+        print("❌ payment credited twice")
+        raise SystemExit(1)
+    print("✅ replayed confirmation credited nothing")
+
+
+if __name__ == "__main__":
+    main()
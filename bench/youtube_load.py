@@ -0,0 +1,170 @@
+# bench/youtube_load.py
+# Load test for the YouTube alert pipeline: a local fake uploads-feed server,
+# an in-memory Supabase stand-in and the real YouTube.check_videos cycle.
+#
+#   python -m bench.youtube_load --rows 5000 --channels 2000 --cycles 3
+#
+# Reports per cycle: duration, feed requests, 304s, alerts sent and the
+# worst / total event-loop stall seen by a 5 ms ticker. The feed server
+# shares the event loop, so stall numbers are an upper bound for the bot.
+import argparse, asyncio, random, time
+from types import SimpleNamespace
+
+import aiohttp
+from aiohttp import web
+
+from bench.fake_supabase import FakeSupabase
+from utils import supabase_db as db
+from utils import youtube_poller
+
+TICK = 0.005
+
+
+# ===============================
+# FAKE FEED SERVER
+# ===============================
+class FeedServer:
+    def __init__(self, channels, latency):
+        self.latest = {ch: f"{ch}-v0" for ch in channels}
+        self.latency = latency
+        self.hits = 0
+
+    async def feed(self, request):
+        self.hits += 1
+        channel = request.query.get("channel_id")
+        video = self.latest.get(channel)
+        if video is None:
+            return web.Response(status=404)
+
+        await asyncio.sleep(self.latency)
+
+        etag = f'"{video}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+
+        body = (
+            '<?xml version="1.0"?><feed xmlns:yt="http://www.youtube.com/xml/schemas/2015">'
+            f"<entry><yt:videoId>{video}</yt:videoId></entry></feed>"
+        )
+        return web.Response(text=body, content_type="application/atom+xml", headers={"ETag": etag})
+
+    def publish(self, fraction):
+        for ch in random.sample(list(self.latest), int(len(self.latest) * fraction)):
+            n = int(self.latest[ch].rsplit("-v", 1)[1]) + 1
+            self.latest[ch] = f"{ch}-v{n}"
+
+
+# ===============================
+# FAKE DISCORD
+# ===============================
+class FakeChannel:
+    sent = 0
+
+    async def send(self, *_, **__):
+        FakeChannel.sent += 1
+
+
+class FakeBot:
+    def __init__(self, session):
+        self.http_session = session
+        self._channel = FakeChannel()
+        self._guild = SimpleNamespace(get_channel=lambda _id: self._channel)
+
+    def get_guild(self, _id):
+        return self._guild
+
+    async def wait_until_ready(self):
+        await asyncio.Event().wait()   # keep the cog's own loop parked
+
+
+# ===============================
+# LOOP MONITOR
+# ===============================
+class LoopMonitor:
+    def __init__(self):
+        self.worst = 0.0
+        self.total = 0.0
+
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lag = time.perf_counter() - start - TICK
+            self.worst = max(self.worst, lag)
+            if lag > TICK:
+                self.total += lag
+
+    def reset(self):
+        self.worst = self.total = 0.0
+
+
+async def run(args):
+    channels = [f"UC{i:020d}" for i in range(args.channels)]
+    server = FeedServer(channels, args.latency / 1000)
+
+    app = web.Application()
+    app.router.add_get("/feeds/videos.xml", server.feed)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+
+    youtube_poller.FEED_URL = f"http://127.0.0.1:{args.port}/feeds/videos.xml"
+    fake = FakeSupabase()
+    await db.init_db(client=fake)
+
+    for i in range(args.rows):
+        await db.add_youtube_alert(i % 500, channels[i % len(channels)], i, None)
+
+    from cogs.youtube import YouTube
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        cog = YouTube(FakeBot(session))
+        cog.poller = youtube_poller.YouTubePoller(
+            session, youtube_poller.FEED_URL, args.concurrency
+        )
+
+        monitor = LoopMonitor()
+        ticker = asyncio.create_task(monitor.run())
+
+        print(f"rows={args.rows} channels={args.channels} "
+              f"dedupe ratio={args.rows / args.channels:.1f}x concurrency={args.concurrency}")
+
+        for cycle in range(1, args.cycles + 1):
+            if cycle > 1:
+                server.publish(args.churn)
+
+            monitor.reset()
+            hits, not_modified, sent = server.hits, cog.poller.not_modified, FakeChannel.sent
+            start = time.perf_counter()
+            await cog.check_videos()
+            elapsed = time.perf_counter() - start
+
+            print(
+                f"cycle {cycle}: {elapsed:6.2f}s  "
+                f"requests={server.hits - hits}  304s={cog.poller.not_modified - not_modified}  "
+                f"alerts={FakeChannel.sent - sent}  "
+                f"loop stall worst={monitor.worst * 1000:.1f}ms total={monitor.total * 1000:.0f}ms"
+            )
+
+        ticker.cancel()
+        cog.check_videos.cancel()
+
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--channels", type=int, default=2000)
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--churn", type=float, default=0.05, help="fraction of channels uploading per cycle")
+    parser.add_argument("--latency", type=float, default=80, help="feed response latency (ms)")
+    parser.add_argument("--concurrency", type=int, default=youtube_poller.CONCURRENCY)
+    parser.add_argument("--port", type=int, default=8799)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
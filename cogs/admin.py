@@ -1,16 +1,23 @@
-import discord
-import os
+import discord, asyncio
 from discord.ext import commands
 from discord import app_commands
-from supabase import create_client
+from utils import supabase_db as db
+from utils import guild_settings
+from utils.custom_commands import CommandIndex
+from utils.downloads import fetch_limited, shrink_image, DownloadError
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+EMOJI_MAX_BYTES = 256 * 1024          # Discord's emoji upload limit
+DOWNLOAD_MAX_BYTES = 4 * 1024 * 1024  # larger images are refused outright
+EMOJI_TYPES = ("image/png", "image/jpeg", "image/gif", "image/webp")
 
 class Admin(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.commands_index = CommandIndex()
+
+    async def cog_load(self):
+        self.commands_index.load(await db.list_custom_commands())
+        print(f"✅ Loaded {len(self.commands_index)} custom commands")
 
     # ================= CLEAR CHAT =================
     @app_commands.command(name="clear", description="Clear messages")
@@ -85,10 +92,8 @@ class Admin(commands.Cog):
         name: str,
         response: str
     ):
-        supabase.table("custom_commands").upsert({
-            "name": name.lower(),
-            "response": response
-        }).execute()
+        await db.set_custom_command(interaction.guild.id, name.lower(), response)
+        self.commands_index.set(interaction.guild.id, name.lower(), response)
 
         await interaction.response.send_message(
             f"✅ Custom command `/{name}` added",
@@ -98,17 +103,56 @@ class Admin(commands.Cog):
     # ================= RUN CUSTOM COMMAND =================
     @app_commands.command(name="custom", description="Run a custom command")
     async def custom(self, interaction: discord.Interaction, name: str):
-        res = supabase.table("custom_commands").select("*").eq(
-            "name", name.lower()
-        ).execute()
+        # served from memory, no DB round-trip
+        response = self.commands_index.get(interaction.guild.id, name.lower())
 
-        if not res.data:
+        if response is None:
             return await interaction.response.send_message(
                 "❌ Command not found",
                 ephemeral=True
             )
 
-        await interaction.response.send_message(res.data[0]["response"])
+        await interaction.response.send_message(response)
+
+    @custom.autocomplete("name")
+    async def custom_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self.commands_index.complete(interaction.guild.id, current.lower())
+        ]
+
+    # ================= RELOAD CUSTOM COMMANDS =================
+    @app_commands.command(name="reload_commands", description="Reload custom commands from the database")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def reload_commands(self, interaction: discord.Interaction):
+        self.commands_index.load(await db.list_custom_commands())
+        await interaction.response.send_message(
+            f"✅ Reloaded {len(self.commands_index)} custom commands",
+            ephemeral=True
+        )
+
+    # ================= DB POOL STATS =================
+    @app_commands.command(name="db_stats", description="Show database pool stats")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def db_stats(self, interaction: discord.Interaction):
+        stats = self.bot.db_pool.stats()
+
+        embed = discord.Embed(title="🗄️ Database Pool", color=discord.Color.blue())
+        embed.add_field(name="In use", value=f"{stats['in_use']}/{stats['size']}")
+        embed.add_field(name="Idle", value=str(stats["idle"]))
+        embed.add_field(name="Waiting", value=str(stats["waiting"]))
+        embed.add_field(name="Requests", value=str(stats["requests"]))
+        embed.add_field(name="Waits", value=str(stats["waits"]))
+        embed.add_field(name="Avg wait", value=f"{stats['avg_wait_ms']} ms")
+
+        cache = guild_settings.stats()
+        embed.add_field(
+            name="Settings cache",
+            value=f"{cache['hits']} hits / {cache['misses']} misses ({cache['hit_rate']:.0%})",
+            inline=False
+        )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     # ================= ADD EMOJI =================
     @app_commands.command(name="add_emoji", description="Add emoji to server")
@@ -119,28 +163,33 @@ class Admin(commands.Cog):
         name: str,
         image_url: str
     ):
-        try:
-            import requests
-            from io import BytesIO
+        # don't hold the interaction open while a slow URL trickles in
+        await interaction.response.defer(ephemeral=True)
 
-            r = requests.get(image_url)
-            img = BytesIO(r.content)
+        try:
+            data, content_type = await fetch_limited(
+                self.bot.http_session,
+                image_url,
+                DOWNLOAD_MAX_BYTES,
+                content_types=EMOJI_TYPES
+            )
+            if len(data) > EMOJI_MAX_BYTES:
+                data = await asyncio.to_thread(shrink_image, data, EMOJI_MAX_BYTES)
 
             emoji = await interaction.guild.create_custom_emoji(
                 name=name,
-                image=img.read()
+                image=data
             )
-
-            await interaction.response.send_message(
-                f"✅ Emoji created: {emoji}",
-                ephemeral=True
-            )
-        except Exception as e:
-            await interaction.response.send_message(
+        except (DownloadError, discord.HTTPException, OSError) as e:
+            return await interaction.followup.send(
                 f"❌ Failed to create emoji:\n{e}",
                 ephemeral=True
             )
 
+        await interaction.followup.send(
+            f"✅ Emoji created: {emoji}",
+            ephemeral=True
+        )
 
 # ================= SETUP =================
 async def setup(bot: commands.Bot):
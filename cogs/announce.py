@@ -1,12 +1,8 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from supabase import create_client
-import os, time
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from utils import supabase_db as db
+import time
 
 
 class Announce(commands.Cog):
@@ -49,7 +45,7 @@ class Announce(commands.Cog):
             await channel.send(f"{ping}\n{message}")
 
         # Save to Supabase
-        supabase.table("announcements").insert({
+        await db.add_announcement({
             "guild_id": interaction.guild.id,
             "channel_id": channel.id,
             "role_ping": role.id if role else None,
@@ -57,7 +53,7 @@ class Announce(commands.Cog):
             "image_url": image_url,
             "is_embed": embed,
             "timestamp": int(time.time())
-        }).execute()
+        })
 
         await interaction.followup.send("✅ Announcement sent")
 
@@ -67,16 +63,14 @@ class Announce(commands.Cog):
     @app_commands.command(name="announce_history", description="Show announcement history")
     @app_commands.checks.has_permissions(administrator=True)
     async def announce_history(self, interaction: discord.Interaction):
-        res = supabase.table("announcements").select("*").eq(
-            "guild_id", interaction.guild.id
-        ).order("timestamp", desc=True).limit(10).execute()
+        rows = await db.list_announcements(interaction.guild.id)
 
-        if not res.data:
+        if not rows:
             return await interaction.response.send_message("❌ No announcements found", ephemeral=True)
 
         embed = discord.Embed(title="📜 Announcement History", color=discord.Color.blue())
 
-        for row in res.data:
+        for row in rows:
             embed.add_field(
                 name=f"ID: {row['id']}",
                 value=f"<#{row['channel_id']}>\n{row['message'][:100]}...",
@@ -91,7 +85,7 @@ class Announce(commands.Cog):
     @app_commands.command(name="remove_announce", description="Delete announcement record")
     @app_commands.checks.has_permissions(administrator=True)
     async def remove_announce(self, interaction: discord.Interaction, announce_id: int):
-        supabase.table("announcements").delete().eq("id", announce_id).execute()
+        await db.delete_announcement(announce_id)
         await interaction.response.send_message("✅ Announcement removed", ephemeral=True)
 
 
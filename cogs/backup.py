@@ -1,112 +1,209 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
-from supabase import create_client
-import os, json, time, shutil
+from utils.table_backup import (
+    TABLE_KEYS, BACKUP_SUFFIX, MANIFEST_SUFFIX, create_backup, create_snapshot, load_watermark,
+    manifest_path, restore_backup, report_ok, FileSource, SnapshotSource
+)
+from utils.chunk_store import ChunkStore
+import os, time, asyncio
 from typing import List
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 ADMIN_ID = int(os.getenv("ADMIN_ID"))  # your Discord ID
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 BACKUP_DIR = "backups"
-MAX_BACKUPS = 10  # auto delete old backups
-
-TABLES = [
-    "coins",
-    "premium",
-    "welcome_config",
-    "tickets",
-    "payments",
-    "coupons",
-    "announcements"
-]
+STORE_DIR = os.path.join(BACKUP_DIR, "store")   # hourly deduplicated snapshots
+MAX_BACKUPS = 10  # full NDJSON exports kept; incrementals go with their base
+FULL_EVERY = 24 * 3600   # seconds between scheduled full exports, incrementals in between
+MAX_OPTIONS = 25         # Discord select menu limit
+PROGRESS_EVERY = 2       # seconds between restore progress edits
+
+TABLES = list(TABLE_KEYS)
 
 os.makedirs(BACKUP_DIR, exist_ok=True)
+store = ChunkStore(STORE_DIR)
+
+_restore_lock = asyncio.Lock()
 
 
 # =========================
 # UTILS
 # =========================
 def get_backup_files() -> List[str]:
-    files = sorted(os.listdir(BACKUP_DIR), reverse=True)
-    return files
-
-
-def create_backup_file():
-    data = {}
-    for table in TABLES:
-        res = supabase.table(table).select("*").execute()
-        data[table] = res.data
-
-    filename = f"backup_{int(time.time())}.json"
-    path = os.path.join(BACKUP_DIR, filename)
+    # single-file NDJSON exports and legacy JSON backups
+    files = [
+        f for f in os.listdir(BACKUP_DIR)
+        if f.endswith(BACKUP_SUFFIX)
+        or (f.startswith("backup_") and f.endswith(".json") and not f.endswith(MANIFEST_SUFFIX))
+    ]
+    return sorted(files, reverse=True)
+
+
+def get_backup_choices():
+    # (label, value) for the restore menu: snapshots first, then files
+    choices = [
+        (f"📦 {snap['id']} ({sum(snap['tables'].values())} rows)", f"snap:{snap['id']}")
+        for snap in store.list_snapshots()
+    ]
+    choices += [(f"📄 {f}", f"file:{f}") for f in get_backup_files()]
+    return choices
+
+
+def open_source(value):
+    kind, name = value.split(":", 1)
+    if kind == "snap":
+        return SnapshotSource(store, name)
+    return FileSource(os.path.join(BACKUP_DIR, name))
+
+
+async def create_snapshot_backup():
+    snapshot_id, manifest = await create_snapshot(store)
+    await asyncio.to_thread(store.apply_retention)
+    await asyncio.to_thread(store.gc)
+    return snapshot_id, manifest
+
+
+async def create_backup_file(incremental=False):
+    # portable single-file export; incremental exports only hold rows
+    # changed since the previous export
+    mark = load_watermark(BACKUP_DIR)
+    since = mark["watermark"] if incremental and mark else None
+
+    path, _ = await create_backup(BACKUP_DIR, since)
+    return path
 
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
 
+async def scheduled_export():
+    # full once a day, otherwise only rows changed since the last export
+    mark = load_watermark(BACKUP_DIR)
+    due = not mark or not mark.get("last_full") or time.time() - mark["last_full"] > FULL_EVERY
+    path = await create_backup_file(incremental=not due)
+    await asyncio.to_thread(cleanup_old_backups)
     return path
 
 
-def restore_backup_file(file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+async def restore_backup_file(value, dry_run=False, progress=None):
+    source = await asyncio.to_thread(open_source, value)
+    return await restore_backup(source, dry_run=dry_run, progress=progress)
+
 
-    for table in TABLES:
-        supabase.table(table).delete().neq("id", 0).execute()
-        if data.get(table):
-            supabase.table(table).insert(data[table]).execute()
+def format_report(report):
+    lines = []
+    for table, entry in report.items():
+        ok = report_ok({table: entry})
+        checks = []
+        if entry["checksum_ok"] is not None:
+            checks.append("checksum")
+        if entry["db_ok"] is not None:
+            checks.append("db")
+        lines.append(
+            f"{'✅' if ok else '❌'} `{table}`: {entry['restored']}/{entry['expected']} rows"
+            + (f" ({', '.join(checks)} verified)" if ok and checks else "")
+        )
+    return "\n".join(lines)
 
 
 def cleanup_old_backups():
+    # exports only; snapshots follow the store's retention policy
+    # keep the newest MAX_BACKUPS full exports and the incrementals after them
     files = get_backup_files()
-    if len(files) > MAX_BACKUPS:
-        for f in files[MAX_BACKUPS:]:
-            os.remove(os.path.join(BACKUP_DIR, f))
+    fulls = [f for f in files if "_incremental" not in f]
+    if len(fulls) <= MAX_BACKUPS:
+        return
+
+    oldest_kept = fulls[MAX_BACKUPS - 1]
+    for f in files:
+        if f < oldest_kept:
+            path = os.path.join(BACKUP_DIR, f)
+            os.remove(path)
+            if f.endswith(BACKUP_SUFFIX) and os.path.exists(manifest_path(path)):
+                os.remove(manifest_path(path))
 
 
 # =========================
 # DROPDOWN
 # =========================
 class BackupSelect(discord.ui.Select):
-    def __init__(self, files):
+    def __init__(self, choices):
         options = [
-            discord.SelectOption(label=f, value=f)
-            for f in files
+            discord.SelectOption(label=label, value=value)
+            for label, value in choices[:MAX_OPTIONS]
         ]
         super().__init__(placeholder="Select backup file", options=options)
 
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.send_message(
-            f"⚠️ Are you sure to restore `{self.values[0]}`?",
+            f"⚠️ Are you sure to restore `{self.values[0].split(':', 1)[1]}`?",
             view=RestoreConfirmView(self.values[0]),
             ephemeral=True
         )
 
 
 class BackupSelectView(discord.ui.View):
-    def __init__(self, files):
+    def __init__(self, choices):
         super().__init__(timeout=60)
-        self.add_item(BackupSelect(files))
+        self.add_item(BackupSelect(choices))
 
 
 # =========================
 # CONFIRM BUTTONS
 # =========================
 class RestoreConfirmView(discord.ui.View):
-    def __init__(self, filename):
+    def __init__(self, value):
         super().__init__(timeout=30)
-        self.filename = filename
+        self.value = value
+        self.filename = value.split(":", 1)[1]
 
     @discord.ui.button(label="✅ Confirm Restore", style=discord.ButtonStyle.danger)
     async def confirm(self, interaction: discord.Interaction, _):
+        await self._run(interaction, dry_run=False)
+
+    @discord.ui.button(label="🧪 Dry Run", style=discord.ButtonStyle.primary)
+    async def dry_run(self, interaction: discord.Interaction, _):
+        await self._run(interaction, dry_run=True)
+
+    async def _run(self, interaction, dry_run):
+        if _restore_lock.locked():
+            return await interaction.response.send_message("❌ A restore is already running", ephemeral=True)
+
+        async with _restore_lock:
+            await self._restore(interaction, dry_run)
+
+    async def _restore(self, interaction, dry_run):
+        # the restore outlives the 3s interaction window; report through followups
+        await interaction.response.defer(thinking=True)
+        label = "Dry run" if dry_run else "Restore"
+        status = await interaction.followup.send(f"⏳ {label} of `{self.filename}` started…", wait=True)
+        last_update = time.monotonic()
+
+        async def progress(done, total):
+            nonlocal last_update
+            if time.monotonic() - last_update < PROGRESS_EVERY:
+                return
+            last_update = time.monotonic()
+            of_total = f"/{total}" if total else ""
+            try:
+                await status.edit(content=f"⏳ {label}: {done}{of_total} rows…")
+            except discord.HTTPException:
+                pass
+
+        async def finish(content):
+            # the webhook token dies after 15 minutes; a long restore still
+            # has to report, so fall back to a plain channel message
+            try:
+                await status.edit(content=content)
+            except discord.HTTPException:
+                await interaction.channel.send(f"{interaction.user.mention} {content}")
+
         try:
-            restore_backup_file(os.path.join(BACKUP_DIR, self.filename))
-            await interaction.response.send_message("✅ Backup restored successfully")
+            report = await restore_backup_file(self.value, dry_run=dry_run, progress=progress)
         except Exception as e:
-            await interaction.response.send_message(f"❌ Restore failed: {e}")
+            return await finish(f"❌ {label} failed: {e}")
+
+        title = "✅ Backup restored successfully" if report_ok(report) else "⚠️ Restore finished with mismatches"
+        if dry_run:
+            title = "✅ Dry run passed" if report_ok(report) else "⚠️ Dry run found mismatches"
+        await finish(f"{title}\n{format_report(report)}")
 
     @discord.ui.button(label="❌ Cancel", style=discord.ButtonStyle.secondary)
     async def cancel(self, interaction: discord.Interaction, _):
@@ -122,16 +219,26 @@ class Backup(commands.Cog):
         self.auto_backup.start()
 
     # ================= AUTO BACKUP (1 HOUR) =================
+    # deduplicated snapshot for fast restores, plus the portable NDJSON
+    # export chain (daily full, hourly incrementals)
     @tasks.loop(hours=1)
     async def auto_backup(self):
         try:
-            path = create_backup_file()
-            cleanup_old_backups()
-            print(f"💾 Auto backup created: {path}")
+            snapshot_id, manifest = await create_snapshot_backup()
+            print(f"💾 Auto snapshot {snapshot_id}: {manifest['stored'] // 1024} KB new")
         except Exception as e:
-            admin = self.bot.get_user(ADMIN_ID)
-            if admin:
-                await admin.send(f"❌ Backup failed: {e}")
+            await self.notify_failure("Snapshot", e)
+
+        try:
+            path = await scheduled_export()
+            print(f"💾 Auto export created: {path}")
+        except Exception as e:
+            await self.notify_failure("Export", e)
+
+    async def notify_failure(self, label, error):
+        admin = self.bot.get_user(ADMIN_ID)
+        if admin:
+            await admin.send(f"❌ {label} backup failed: {error}")
 
     @auto_backup.before_loop
     async def before_backup(self):
@@ -139,32 +246,47 @@ class Backup(commands.Cog):
 
     # ================= MANUAL BACKUP =================
     @app_commands.command(name="backup_now", description="Create database backup now")
+    @app_commands.describe(mode="snapshot (deduplicated), export (single file) or export_incremental")
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="snapshot", value="snapshot"),
+        app_commands.Choice(name="export", value="export"),
+        app_commands.Choice(name="export_incremental", value="export_incremental")
+    ])
     @app_commands.checks.has_permissions(administrator=True)
-    async def backup_now(self, interaction: discord.Interaction):
+    async def backup_now(self, interaction: discord.Interaction, mode: str = "snapshot"):
+        # paging every table can outlast the 3s interaction window
+        await interaction.response.defer(ephemeral=True)
         try:
-            path = create_backup_file()
-            size = os.path.getsize(path) // 1024
-            cleanup_old_backups()
-
-            await interaction.response.send_message(
-                f"✅ Backup created\n📁 File: `{os.path.basename(path)}`\n📦 Size: `{size} KB`",
-                ephemeral=True
-            )
+            if mode == "snapshot":
+                snapshot_id, manifest = await create_snapshot_backup()
+                usage = await asyncio.to_thread(store.disk_usage)
+                message = (
+                    f"✅ Snapshot created\n📦 ID: `{snapshot_id}`\n"
+                    f"🧩 New data: `{manifest['stored'] // 1024} KB` of `{manifest['size'] // 1024} KB`\n"
+                    f"🗄️ Store size: `{usage // 1024} KB`"
+                )
+            else:
+                path = await create_backup_file(incremental=mode == "export_incremental")
+                size = os.path.getsize(path) // 1024
+                await asyncio.to_thread(cleanup_old_backups)
+                message = f"✅ Backup created\n📁 File: `{os.path.basename(path)}`\n📦 Size: `{size} KB`"
+
+            await interaction.followup.send(message, ephemeral=True)
         except Exception as e:
-            await interaction.response.send_message(f"❌ Backup failed: {e}", ephemeral=True)
+            await interaction.followup.send(f"❌ Backup failed: {e}", ephemeral=True)
 
     # ================= RESTORE BACKUP =================
     @app_commands.command(name="restore_backup", description="Restore database from backup")
     @app_commands.checks.has_permissions(administrator=True)
     async def restore_backup(self, interaction: discord.Interaction):
-        files = get_backup_files()
+        choices = await asyncio.to_thread(get_backup_choices)
 
-        if not files:
+        if not choices:
             return await interaction.response.send_message("❌ No backups found", ephemeral=True)
 
         await interaction.response.send_message(
-            "Select a backup file:",
-            view=BackupSelectView(files),
+            "Select a backup:",
+            view=BackupSelectView(choices),
             ephemeral=True
         )
 
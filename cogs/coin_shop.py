@@ -1,13 +1,7 @@
 import discord
-import os
 from discord.ext import commands
 from discord import app_commands
-from supabase import create_client
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from utils.coin_ledger import get_ledger
 
 # ================= VIEW =================
 class CoinShopView(discord.ui.View):
@@ -22,11 +16,8 @@ class CoinShopView(discord.ui.View):
     async def buy(self, interaction: discord.Interaction, button: discord.ui.Button):
         user_id = interaction.user.id
 
-        # create user if not exists
-        supabase.table("coins").upsert({
-            "user_id": user_id,
-            "balance": 0
-        }).execute()
+        # create user if not exists (adding 0 never touches an existing balance)
+        await get_ledger().add(user_id, 0)
 
         await interaction.response.send_message(
             "💳 To buy coins, please contact an admin and use `/confirm_payment`.",
@@ -61,18 +52,14 @@ class CoinShop(commands.Cog):
     # ---------------- BALANCE ----------------
     @app_commands.command(name="balance", description="Check your coin balance")
     async def balance(self, interaction: discord.Interaction):
-        res = supabase.table("coins").select("*").eq(
-            "user_id", interaction.user.id
-        ).execute()
+        bal = await get_ledger().get(interaction.user.id)
 
-        if not res.data:
+        if not bal:
             return await interaction.response.send_message(
                 "❌ You have no coins yet.",
                 ephemeral=True
             )
 
-        bal = res.data[0]["balance"]
-
         embed = discord.Embed(
             title="💰 Your Coin Balance",
             description=f"**{bal} PSG Coins**",
@@ -1,17 +1,41 @@
 # cogs/coupons.py
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-from supabase import create_client
-import os, time
+from utils.coin_ledger import get_ledger
+from utils.coupon_index import CouponIndex, EXPIRED_GRACE
+import time
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+REFRESH_MINUTES = 10   # picks up coupons created outside this bot
+
+REDEEM_ERRORS = {
+    "invalid": "❌ Invalid coupon",
+    "expired": "❌ Coupon expired",
+    "exhausted": "❌ Coupon limit reached",
+    "already_redeemed": "❌ You already redeemed this coupon"
+}
 
 class Coupons(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.index = CouponIndex()
+
+    async def cog_load(self):
+        self.refresh_index.start()
+
+    async def cog_unload(self):
+        self.refresh_index.cancel()
+
+    # ---------------- INDEX REFRESH ----------------
+    @tasks.loop(minutes=REFRESH_MINUTES)
+    async def refresh_index(self):
+        started = time.monotonic()
+        try:
+            rows = await get_ledger().list_coupons(int(time.time()) - EXPIRED_GRACE)
+        except Exception as e:
+            print("Coupon index load error:", e)
+            return
+        self.index.load(rows, started)
 
     # ---------------- CREATE COUPON ----------------
     @app_commands.command(name="create_coupon", description="Create coupon")
@@ -26,53 +50,32 @@ class Coupons(commands.Cog):
     ):
         expires = int(time.time()) + (days_valid * 86400)
 
-        supabase.table("coupons").insert({
-            "code": code.upper(),
-            "value": value,
-            "max_uses": max_uses,
-            "used": 0,
-            "expires": expires
-        }).execute()
+        await get_ledger().create_coupon(code.upper(), value, max_uses, expires)
+        self.index.add(code.upper(), value, max_uses, expires)
 
         await interaction.response.send_message(f"✅ Coupon `{code}` created")
 
     # ---------------- REDEEM COUPON ----------------
     @app_commands.command(name="redeem_coupon", description="Redeem coupon")
     async def redeem_coupon(self, interaction: discord.Interaction, code: str):
-        res = supabase.table("coupons").select("*").eq("code", code.upper()).execute()
-
-        if not res.data:
-            return await interaction.response.send_message("❌ Invalid coupon")
+        code = code.upper()
+        now = int(time.time())
 
-        coupon = res.data[0]
+        # unknown, expired and used-up codes never reach the database
+        status = self.index.check(code, now)
+        if status is not None:
+            return await interaction.response.send_message(REDEEM_ERRORS[status])
 
-        if coupon["used"] >= coupon["max_uses"]:
-            return await interaction.response.send_message("❌ Coupon limit reached")
+        # one round-trip: dedupe, guarded usage increment and credit together
+        status, value, _ = await get_ledger().redeem_coupon(code, interaction.user.id, now)
+        self.index.observe(code, status)
 
-        if coupon["expires"] < int(time.time()):
-            return await interaction.response.send_message("❌ Coupon expired")
-
-        # Add coins
-        coin = supabase.table("coins").select("*").eq("user_id", interaction.user.id).execute()
-
-        if not coin.data:
-            supabase.table("coins").insert({
-                "user_id": interaction.user.id,
-                "balance": coupon["value"]
-            }).execute()
-        else:
-            supabase.table("coins").update({
-                "balance": coin.data[0]["balance"] + coupon["value"]
-            }).eq("user_id", interaction.user.id).execute()
-
-        supabase.table("coupons").update({
-            "used": coupon["used"] + 1
-        }).eq("code", code.upper()).execute()
+        if status != "ok":
+            return await interaction.response.send_message(REDEEM_ERRORS[status])
 
         await interaction.response.send_message(
-            f"🎉 Coupon redeemed! You got **{coupon['value']} coins**"
+            f"🎉 Coupon redeemed! You got **{value} coins**"
         )
 
-
 async def setup(bot: commands.Bot):
     await bot.add_cog(Coupons(bot))
@@ -1,31 +1,28 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from supabase import create_client
-import os
-
-# ================= SUPABASE =================
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from utils.coin_ledger import get_ledger, coin_leaderboard
+from utils import user_themes
+from utils.themes import embed_color
 
 # ================= COG =================
 class Economy(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.ledger = get_ledger()
 
     # ---------------- BALANCE ----------------
     @app_commands.command(name="balance", description="💰 Check your coin balance")
     async def balance(self, interaction: discord.Interaction):
         user_id = interaction.user.id
 
-        res = supabase.table("coins").select("*").eq("user_id", user_id).execute()
-        balance = res.data[0]["balance"] if res.data else 0
+        balance = await self.ledger.get(user_id)
+        theme = await user_themes.get_theme(user_id)
 
         embed = discord.Embed(
             title="💰 Coin Balance",
             description=f"{interaction.user.mention}\n\n**Balance:** `{balance}` PSG Coins",
-            color=discord.Color.gold()
+            color=embed_color(theme)
         )
         await interaction.response.send_message(embed=embed)
 
@@ -36,13 +33,7 @@ class Economy(commands.Cog):
         if amount <= 0:
             return await interaction.response.send_message("❌ Amount must be positive.", ephemeral=True)
 
-        res = supabase.table("coins").select("*").eq("user_id", member.id).execute()
-        balance = res.data[0]["balance"] if res.data else 0
-
-        supabase.table("coins").upsert({
-            "user_id": member.id,
-            "balance": balance + amount
-        }).execute()
+        await self.ledger.add(member.id, amount)
 
         await interaction.response.send_message(
             f"✅ Added **{amount} coins** to {member.mention}"
@@ -55,15 +46,7 @@ class Economy(commands.Cog):
         if amount <= 0:
             return await interaction.response.send_message("❌ Amount must be positive.", ephemeral=True)
 
-        res = supabase.table("coins").select("*").eq("user_id", member.id).execute()
-        balance = res.data[0]["balance"] if res.data else 0
-
-        new_balance = max(0, balance - amount)
-
-        supabase.table("coins").upsert({
-            "user_id": member.id,
-            "balance": new_balance
-        }).execute()
+        new_balance = await self.ledger.remove(member.id, amount, clamp=True)
 
         await interaction.response.send_message(
             f"✅ Removed **{amount} coins** from {member.mention}\nNew Balance: `{new_balance}`"
@@ -78,24 +61,14 @@ class Economy(commands.Cog):
         sender_id = interaction.user.id
         receiver_id = member.id
 
-        sender_res = supabase.table("coins").select("*").eq("user_id", sender_id).execute()
-        sender_balance = sender_res.data[0]["balance"] if sender_res.data else 0
-
-        if sender_balance < amount:
-            return await interaction.response.send_message("❌ Not enough coins.", ephemeral=True)
+        if sender_id == receiver_id:
+            return await interaction.response.send_message("❌ You can't transfer to yourself.", ephemeral=True)
 
-        receiver_res = supabase.table("coins").select("*").eq("user_id", receiver_id).execute()
-        receiver_balance = receiver_res.data[0]["balance"] if receiver_res.data else 0
+        # atomic: debits only if the sender can afford it
+        result = await self.ledger.transfer(sender_id, receiver_id, amount)
 
-        supabase.table("coins").upsert({
-            "user_id": sender_id,
-            "balance": sender_balance - amount
-        }).execute()
-
-        supabase.table("coins").upsert({
-            "user_id": receiver_id,
-            "balance": receiver_balance + amount
-        }).execute()
+        if result is None:
+            return await interaction.response.send_message("❌ Not enough coins.", ephemeral=True)
 
         await interaction.response.send_message(
             f"✅ {interaction.user.mention} sent **{amount} coins** to {member.mention}"
@@ -103,22 +76,23 @@ class Economy(commands.Cog):
 
     # ---------------- LEADERBOARD ----------------
     @app_commands.command(name="coin_leaderboard", description="🏆 Coin leaderboard")
-    async def leaderboard(self, interaction: discord.Interaction):
-        res = supabase.table("coins").select("*").order("balance", desc=True).limit(10).execute()
+    async def leaderboard(self, interaction: discord.Interaction, page: int = 1):
+        # served from the in-memory board kept current by the ledger
+        rows, pages = await coin_leaderboard.page(None, max(page, 1))
 
-        if not res.data:
+        if not rows:
             return await interaction.response.send_message("❌ No data found.")
 
-        embed = discord.Embed(title="🏆 Coin Leaderboard", color=discord.Color.gold())
-
-        for i, row in enumerate(res.data, start=1):
-            user = self.bot.get_user(row["user_id"])
-            name = user.name if user else str(row["user_id"])
-            embed.add_field(
-                name=f"{i}. {name}",
-                value=f"💰 {row['balance']} coins",
-                inline=False
-            )
+        theme = await user_themes.get_theme(interaction.user.id)
+        embed = discord.Embed(
+            title="🏆 Coin Leaderboard",
+            description="\n".join(
+                f"**{rank}.** <@{row['user_id']}> — 💰 {row['balance']} coins"
+                for rank, row in rows
+            ),
+            color=embed_color(theme)
+        )
+        embed.set_footer(text=f"Page {max(page, 1)}/{pages}")
 
         await interaction.response.send_message(embed=embed)
 
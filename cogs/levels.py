@@ -1,86 +1,193 @@
 # cogs/levels.py
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-from supabase import create_client
-import os, random
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from utils import supabase_db as db
+from utils import guild_settings
+from utils.xp_buffer import XPBuffer
+from utils.cooldowns import CooldownTracker, MAX_WINDOW
+from utils.leaderboard import Leaderboard
+from utils import user_themes
+from utils.themes import get_theme, embed_color
+from utils.cards import render_rank_card, render_leaderboard_card, xp_bucket
+from utils.card_cache import CardCache, AvatarCache
+from io import BytesIO
+import asyncio, random
+
+XP_FLUSH_SECONDS = 30
+XP_COOLDOWN = 60   # default seconds between XP awards per member
 
 class Levels(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.xp = XPBuffer()
+        self.cooldowns = CooldownTracker()
+        self.board = Leaderboard(self.load_leaderboard, score="xp")
+        self.cards = CardCache()
+        self.avatars = AvatarCache()
+        self._flush_task = None
+        self.flush_xp.start()
+
+    async def cog_unload(self):
+        # stop(), not cancel(): an upsert already in flight must finish; the
+        # final flush below waits for it on the buffer's flush lock
+        self.flush_xp.stop()
+        if self._flush_task:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.xp.flush()
+
+    # ---------------- XP FLUSH ----------------
+    @tasks.loop(seconds=XP_FLUSH_SECONDS)
+    async def flush_xp(self):
+        try:
+            await self.xp.flush()
+        except Exception as e:
+            print("XP flush error:", e)
+
+    def _flush_soon(self):
+        if self._flush_task and not self._flush_task.done():
+            return
+        self._flush_task = asyncio.create_task(self.flush_xp())
+
+    # ---------------- XP COOLDOWN ----------------
+    async def get_xp_window(self, guild_id):
+        try:
+            row = await guild_settings.get_settings(guild_id)
+        except Exception as e:
+            print("XP cooldown load error:", e)
+            row = None
+
+        if row and row.get("xp_cooldown") is not None:
+            return row["xp_cooldown"]
+        return XP_COOLDOWN
+
+    @app_commands.command(name="xp_cooldown", description="Set seconds between XP awards")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def xp_cooldown(self, interaction: discord.Interaction, seconds: int):
+        if seconds < 0 or seconds > MAX_WINDOW:
+            return await interaction.response.send_message(
+                f"❌ Cooldown must be between 0 and {MAX_WINDOW} seconds",
+                ephemeral=True
+            )
+
+        await guild_settings.update_settings({
+            "guild_id": interaction.guild.id,
+            "xp_cooldown": seconds
+        })
+
+        await interaction.response.send_message(
+            f"✅ Members now earn XP at most once every **{seconds}s**",
+            ephemeral=True
+        )
 
     # ---------------- XP SYSTEM ----------------
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
-        if message.author.bot:
+        if message.author.bot or not message.guild:
+            return
+
+        # drop messages inside the member's cooldown before any DB work
+        window = await self.get_xp_window(message.guild.id)
+        if not self.cooldowns.try_acquire((message.guild.id, message.author.id), window):
             return
 
         xp_add = random.randint(5, 10)
 
-        res = supabase.table("levels").select("*").eq(
-            "user_id", message.author.id
-        ).eq("guild_id", message.guild.id).execute()
-
-        if not res.data:
-            supabase.table("levels").insert({
-                "user_id": message.author.id,
-                "guild_id": message.guild.id,
-                "xp": xp_add,
-                "level": 1
-            }).execute()
-        else:
-            xp = res.data[0]["xp"] + xp_add
-            level = res.data[0]["level"]
-
-            if xp >= level * 100:
-                level += 1
-                await message.channel.send(f"🎉 {message.author.mention} leveled up to **{level}**!")
-
-            supabase.table("levels").update({
-                "xp": xp,
-                "level": level
-            }).eq("user_id", message.author.id).eq("guild_id", message.guild.id).execute()
+        # memory only; written back to `levels` by flush_xp
+        xp, level, leveled_up = await self.xp.add_xp(
+            message.guild.id, message.author.id, xp_add
+        )
+        self.board.update(message.guild.id, message.author.id, {
+            "user_id": message.author.id,
+            "xp": xp,
+            "level": level
+        })
+
+        if self.xp.should_flush:
+            self._flush_soon()
+
+        if leveled_up:
+            await message.channel.send(f"🎉 {message.author.mention} leveled up to **{level}**!")
 
     # ---------------- RANK ----------------
     @app_commands.command(name="rank", description="Show your level")
     async def rank(self, interaction: discord.Interaction, member: discord.Member = None):
         member = member or interaction.user
 
-        res = supabase.table("levels").select("*").eq(
-            "user_id", member.id
-        ).eq("guild_id", interaction.guild.id).execute()
+        key = (interaction.guild.id, member.id)
+        data = self.xp.entries.get(key) or await db.get_level(*key)
 
-        if not res.data:
+        if not data:
             return await interaction.response.send_message("❌ No data found")
 
-        data = res.data[0]
+        text = f"🏆 {member.mention}\nLevel: **{data['level']}**\nXP: **{data['xp']}**"
+        try:
+            theme = await user_themes.get_theme(member.id)
+            avatar, avatar_hash = await self.avatars.get(member)
+            bucket = xp_bucket(data["xp"], data["level"])
+            # everything drawn on the card is in the key, the name included
+            name = member.display_name
+            png = await self.cards.get_or_render(
+                ("rank", member.id, name, data["level"], bucket, theme, avatar_hash),
+                render_rank_card, name, data["level"], bucket, get_theme(theme), avatar
+            )
+        except Exception as e:
+            print("Rank card error:", e)
+            return await interaction.response.send_message(text)
+
         await interaction.response.send_message(
-            f"🏆 {member.mention}\nLevel: **{data['level']}**\nXP: **{data['xp']}**"
+            text,
+            file=discord.File(BytesIO(png), filename="rank.png")
         )
 
     # ---------------- LEADERBOARD ----------------
-    @app_commands.command(name="leaderboard", description="Top 10 users")
-    async def leaderboard(self, interaction: discord.Interaction):
-        res = supabase.table("levels").select("*").eq(
-            "guild_id", interaction.guild.id
-        ).order("xp", desc=True).limit(10).execute()
+    async def load_leaderboard(self, guild_id, limit):
+        # make the DB current before rebuilding from it
+        await self.flush_xp()
+        return await db.top_levels(guild_id, limit)
 
-        embed = discord.Embed(title="🏆 Leaderboard", color=discord.Color.blue())
+    @app_commands.command(name="leaderboard", description="Top users by XP")
+    async def leaderboard(self, interaction: discord.Interaction, page: int = 1):
+        page = max(page, 1)
+        rows, pages = await self.board.page(interaction.guild.id, page)
 
-        for i, row in enumerate(res.data, start=1):
+        if not rows:
+            return await interaction.response.send_message("❌ No data found")
+
+        # one query for every theme on the page, then all served from memory
+        themes = await user_themes.get_themes(
+            [interaction.user.id] + [row["user_id"] for _, row in rows]
+        )
+        theme = themes[interaction.user.id]
+
+        card_rows = []
+        for rank, row in rows:
             user = interaction.guild.get_member(row["user_id"])
-            embed.add_field(
-                name=f"{i}. {user.name if user else row['user_id']}",
-                value=f"Level {row['level']} | XP {row['xp']}",
-                inline=False
+            name = user.display_name if user else str(row["user_id"])
+            accent = get_theme(themes[row["user_id"]])["colors"]["accent"]
+            card_rows.append((rank, name, row["level"], row["xp"], accent))
+
+        try:
+            png = await self.cards.get_or_render(
+                ("leaderboard", interaction.guild.id, theme, pages, tuple(card_rows)),
+                render_leaderboard_card, f"Leaderboard • Page {page}/{pages}", card_rows, get_theme(theme)
             )
+        except Exception as e:
+            print("Leaderboard card error:", e)
+            embed = discord.Embed(
+                title="🏆 Leaderboard",
+                description="\n".join(
+                    f"**{rank}.** <@{row['user_id']}> — Level {row['level']} | XP {row['xp']}"
+                    for rank, row in rows
+                ),
+                color=embed_color(theme)
+            )
+            embed.set_footer(text=f"Page {page}/{pages}")
+            return await interaction.response.send_message(embed=embed)
 
-        await interaction.response.send_message(embed=embed)
-
+        await interaction.response.send_message(
+            file=discord.File(BytesIO(png), filename="leaderboard.png")
+        )
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Levels(bot))
@@ -2,12 +2,7 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from supabase import create_client
-import os
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from utils import supabase_db as db
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
@@ -38,19 +33,14 @@ class Moderation(commands.Cog):
     @app_commands.command(name="warn", description="Warn a member")
     @app_commands.checks.has_permissions(manage_messages=True)
     async def warn(self, interaction: discord.Interaction, member: discord.Member):
-        res = supabase.table("warnings").select("*").eq("user_id", member.id).eq("guild_id", interaction.guild.id).execute()
+        row = await db.get_warnings(interaction.guild.id, member.id)
 
-        if not res.data:
+        if not row:
             count = 1
-            supabase.table("warnings").insert({
-                "user_id": member.id,
-                "guild_id": interaction.guild.id,
-                "count": count
-            }).execute()
+            await db.insert_warnings(interaction.guild.id, member.id, count)
         else:
-            count = res.data[0]["count"] + 1
-            supabase.table("warnings").update({"count": count}).eq(
-                "user_id", member.id).eq("guild_id", interaction.guild.id).execute()
+            count = row["count"] + 1
+            await db.update_warnings(interaction.guild.id, member.id, count)
 
         await interaction.response.send_message(f"⚠️ {member.mention} warned ({count}/3)")
 
@@ -61,13 +51,13 @@ class Moderation(commands.Cog):
     # ---------------- WARN LIST ----------------
     @app_commands.command(name="warnings", description="Check warnings")
     async def warnings(self, interaction: discord.Interaction, member: discord.Member):
-        res = supabase.table("warnings").select("*").eq("user_id", member.id).eq("guild_id", interaction.guild.id).execute()
+        row = await db.get_warnings(interaction.guild.id, member.id)
 
-        if not res.data:
+        if not row:
             return await interaction.response.send_message("✅ No warnings")
 
         await interaction.response.send_message(
-            f"⚠️ {member.mention} has {res.data[0]['count']} warnings"
+            f"⚠️ {member.mention} has {row['count']} warnings"
         )
 
 
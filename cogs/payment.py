@@ -1,51 +1,27 @@
 import discord
-import os
 import time
-import random
 from discord.ext import commands
 from discord import app_commands
-from supabase import create_client
-from PIL import Image, ImageDraw, ImageFont
+from utils.coin_ledger import get_ledger
+from utils.invoice import load_template, render_invoice
+from utils.render import run_render
 from io import BytesIO
-import requests
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+import asyncio, re
 
 UPI_ID = "psgfamily@upi"
 RUPEE_RATE = 2
 COINS_PER_RATE = 6
 LOGO_URL = "https://cdn.discordapp.com/attachments/1415142396341256275/1463808464840294463/1000068286-removebg-preview.png"
-BG_URL = "https://files.catbox.moe/yslxzu.png"
-
-# ================= INVOICE IMAGE =================
-def generate_invoice(username: str, rupees: int, coins: int):
-    bg = Image.open(BytesIO(requests.get(BG_URL).content)).resize((900, 500))
-    draw = ImageDraw.Draw(bg)
-
-    try:
-        font_big = ImageFont.truetype("fonts/CinzelDecorative-Bold.ttf", 36)
-        font_small = ImageFont.truetype("fonts/CinzelDecorative-Bold.ttf", 24)
-    except:
-        font_big = font_small = ImageFont.load_default()
-
-    invoice_id = f"PSG-{random.randint(10000,99999)}"
-    date = time.strftime("%d-%m-%Y %H:%M")
-
-    draw.text((50, 50), "PSG FAMILY INVOICE", font=font_big, fill="white")
-    draw.text((50, 130), f"Customer: {username}", font=font_small, fill="white")
-    draw.text((50, 180), f"Paid Amount: ₹{rupees}", font=font_small, fill="white")
-    draw.text((50, 230), f"Coins Credited: {coins}", font=font_small, fill="white")
-    draw.text((50, 280), f"Invoice ID: {invoice_id}", font=font_small, fill="white")
-    draw.text((50, 330), f"Date: {date}", font=font_small, fill="white")
-    draw.text((700, 420), "PAID", font=font_big, fill="green")
+REFERENCE_RE = re.compile(r"[A-Z0-9-]{6,64}")   # UPI UTR / transaction id
 
-    buf = BytesIO()
-    bg.save(buf, "PNG")
-    buf.seek(0)
 
-    return buf, invoice_id
+def payment_invoice_id(reference):
+    # one invoice per external payment: confirming the same UPI reference
+    # twice, from any admin or any retry, maps to the same invoice id
+    reference = re.sub(r"\s+", "", reference).upper()
+    if not REFERENCE_RE.fullmatch(reference):
+        return None
+    return f"PSG-{reference}"
 
 
 # ================= VIEW =================
@@ -72,6 +48,11 @@ class Payment(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_load(self):
+        # fetch/decode the background once, then warm the render workers
+        await asyncio.to_thread(load_template)
+        await run_render(load_template)
+
     # ---------------- PANEL ----------------
     @app_commands.command(name="payment_panel", description="Create payment panel")
     @app_commands.checks.has_permissions(administrator=True)
@@ -94,47 +75,51 @@ class Payment(commands.Cog):
 
     # ---------------- CONFIRM PAYMENT ----------------
     @app_commands.command(name="confirm_payment", description="Confirm payment and add coins")
+    @app_commands.describe(reference="UPI transaction id (UTR) of the payment")
     @app_commands.checks.has_permissions(administrator=True)
     async def confirm_payment(
         self,
         interaction: discord.Interaction,
         member: discord.Member,
-        rupees: int
+        rupees: int,
+        reference: str
     ):
         await interaction.response.defer(ephemeral=True)
 
         if rupees <= 0:
             return await interaction.followup.send("❌ Invalid amount")
 
+        invoice_id = payment_invoice_id(reference)
+        if invoice_id is None:
+            return await interaction.followup.send("❌ Invalid payment reference")
+
         coins = (rupees // RUPEE_RATE) * COINS_PER_RATE
 
-        # save coins
-        supabase.table("coins").upsert({
-            "user_id": member.id,
-            "balance": coins
-        }).execute()
+        # record payment + credit coins in one atomic call
+        balance, credited = await get_ledger().credit_payment(
+            invoice_id, member.id, rupees, coins, int(time.time())
+        )
 
-        # generate invoice
-        invoice_img, invoice_id = generate_invoice(member.name, rupees, coins)
+        if not credited:
+            return await interaction.followup.send(
+                f"⚠️ Invoice `{invoice_id}` was already confirmed"
+            )
 
-        # save payment
-        supabase.table("payments").insert({
-            "invoice_id": invoice_id,
-            "user_id": member.id,
-            "rupees": rupees,
-            "coins": coins,
-            "timestamp": int(time.time())
-        }).execute()
+        # generate invoice (off the event loop, encoded once)
+        date = time.strftime("%d-%m-%Y %H:%M")
+        invoice_png = await run_render(
+            render_invoice, member.name, rupees, coins, invoice_id, date
+        )
 
         await interaction.channel.send(
             content="🧾 **Payment Confirmed**",
-            file=discord.File(invoice_img, "invoice.png")
+            file=discord.File(BytesIO(invoice_png), "invoice.png")
         )
 
         try:
             await member.send(
                 "🧾 Your PSG Family Invoice",
-                file=discord.File(invoice_img, "invoice.png")
+                file=discord.File(BytesIO(invoice_png), "invoice.png")
             )
         except:
             pass
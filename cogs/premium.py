@@ -1,14 +1,10 @@
 import discord
 import time
-import os
-from discord.ext import commands, tasks
+import asyncio
+from discord.ext import commands
 from discord import app_commands
-from supabase import create_client
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from utils import supabase_db as db
+from utils.expiry import ExpiryScheduler
 
 TIERS = {
     "bronze": 3,
@@ -19,7 +15,15 @@ TIERS = {
 class Premium(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.check_expiry.start()
+        self.expiry = ExpiryScheduler(self.load_expiring, self.remove_expired)
+        self._expiry_task = None
+
+    async def cog_load(self):
+        self._expiry_task = asyncio.create_task(self.run_expiry())
+
+    async def cog_unload(self):
+        if self._expiry_task:
+            self._expiry_task.cancel()
 
     # ---------------- BUY PREMIUM ----------------
     @app_commands.command(name="buy_premium", description="Buy premium tier")
@@ -35,11 +39,8 @@ class Premium(commands.Cog):
         days = TIERS[tier]
         expires = int(time.time()) + days * 86400
 
-        supabase.table("premium").upsert({
-            "user_id": interaction.user.id,
-            "tier": tier,
-            "expires": expires
-        }).execute()
+        await db.set_premium_until(interaction.user.id, tier, expires)
+        self.expiry.schedule(interaction.user.id, expires)
 
         await interaction.response.send_message(
             f"✅ {interaction.user.mention} bought **{tier.upper()}** premium for {days} days"
@@ -48,17 +49,14 @@ class Premium(commands.Cog):
     # ---------------- STATUS ----------------
     @app_commands.command(name="premium_status", description="Check premium status")
     async def premium_status(self, interaction: discord.Interaction):
-        res = supabase.table("premium").select("*").eq(
-            "user_id", interaction.user.id
-        ).execute()
+        data = await db.get_premium(interaction.user.id)
 
-        if not res.data:
+        if not data:
             return await interaction.response.send_message(
                 "❌ You have no premium",
                 ephemeral=True
             )
 
-        data = res.data[0]
         remaining = data["expires"] - int(time.time())
         days = max(0, remaining // 86400)
 
@@ -66,22 +64,17 @@ class Premium(commands.Cog):
             f"⭐ Tier: **{data['tier']}**\n⏳ Days left: **{days}**"
         )
 
-    # ---------------- AUTO EXPIRY TASK ----------------
-    @tasks.loop(minutes=5)
-    async def check_expiry(self):
-        now = int(time.time())
-        res = supabase.table("premium").select("*").execute()
-
-        for row in res.data:
-            if row["expires"] <= now:
-                supabase.table("premium").delete().eq(
-                    "user_id", row["user_id"]
-                ).execute()
-
-    # ✅ FIXED before_loop
-    @check_expiry.before_loop
-    async def before_check_expiry(self):
+    # ---------------- AUTO EXPIRY ----------------
+    async def load_expiring(self, until):
+        rows = await db.list_premium_expiring(until)
+        return [(row["user_id"], row["expires"]) for row in rows]
+
+    async def remove_expired(self, user_ids, now):
+        await db.delete_expired_premium(user_ids, now)
+
+    async def run_expiry(self):
         await self.bot.wait_until_ready()
+        await self.expiry.run()
 
 
 async def setup(bot: commands.Bot):
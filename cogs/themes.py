@@ -1,12 +1,9 @@
 # cogs/themes.py
-import discord, os
+import discord
 from discord.ext import commands
 from discord import app_commands
-from supabase import create_client
-
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
-
-THEMES = ["default", "neon", "dark", "gold"]
+from utils import user_themes
+from utils.themes import theme_names, embed_color
 
 class Themes(commands.Cog):
     def __init__(self, bot):
@@ -14,20 +11,34 @@ class Themes(commands.Cog):
 
     @app_commands.command(name="themes", description="Show themes")
     async def themes(self, interaction: discord.Interaction):
-        embed = discord.Embed(title="🎨 Themes", description="\n".join(THEMES))
+        current = await user_themes.get_theme(interaction.user.id)
+        embed = discord.Embed(
+            title="🎨 Themes",
+            description="\n".join(
+                f"**{name}** ✅" if name == current else name for name in theme_names()
+            ),
+            color=embed_color(current)
+        )
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="set_theme", description="Set your theme")
     async def set_theme(self, interaction: discord.Interaction, theme: str):
-        if theme not in THEMES:
+        theme = theme.lower()
+        if theme not in theme_names():
             return await interaction.response.send_message("❌ Invalid theme")
 
-        supabase.table("user_themes").upsert({
-            "user_id": interaction.user.id,
-            "theme": theme
-        }).execute()
+        await user_themes.set_theme(interaction.user.id, theme)
+
+        await interaction.response.send_message(
+            embed=discord.Embed(description=f"✅ Theme set to **{theme}**", color=embed_color(theme))
+        )
 
-        await interaction.response.send_message(f"✅ Theme set to **{theme}**")
+    @set_theme.autocomplete("theme")
+    async def theme_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in theme_names() if name.startswith(current.lower())
+        ][:25]
 
 
 async def setup(bot):
@@ -1,10 +1,8 @@
 # cogs/tickets.py
-import discord, os, time
+import discord
 from discord.ext import commands
 from discord import app_commands
-from supabase import create_client
-
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+from utils import supabase_db as db
 
 STAFF_ROLE_NAME = "Staff"
 
@@ -18,9 +16,7 @@ class TicketView(discord.ui.View):
         if staff_role not in interaction.user.roles:
             return await interaction.response.send_message("❌ Staff only", ephemeral=True)
 
-        supabase.table("tickets").update({
-            "claimed_by": interaction.user.id
-        }).eq("channel_id", interaction.channel.id).execute()
+        await db.claim_ticket(interaction.channel.id, interaction.user.id)
 
         await interaction.channel.send(f"✅ Ticket claimed by {interaction.user.mention}")
         await interaction.response.defer()
@@ -60,13 +56,7 @@ class Tickets(commands.Cog):
             overwrites=overwrites
         )
 
-        supabase.table("tickets").insert({
-            "channel_id": channel.id,
-            "user_id": interaction.user.id,
-            "claimed_by": None,
-            "category": category,
-            "created_at": int(time.time())
-        }).execute()
+        await db.create_ticket(channel.id, interaction.user.id, category)
 
         await channel.send(f"{interaction.user.mention}", view=TicketView())
         await interaction.response.send_message(f"✅ Ticket created: {channel.mention}", ephemeral=True)
@@ -1,16 +1,8 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from supabase import create_client, Client
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from utils import guild_settings
+from utils.welcome_pipeline import WelcomePipeline
 
 # 🔗 YOUR LOGO IMAGE
 LOGO_URL = "https://files.catbox.moe/c1lm6g.png"
@@ -19,6 +11,13 @@ LOGO_URL = "https://files.catbox.moe/c1lm6g.png"
 class Welcome(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.pipeline = WelcomePipeline(LOGO_URL)
+
+    async def cog_load(self):
+        self.pipeline.start()
+
+    async def cog_unload(self):
+        await self.pipeline.stop()
 
     # ---------------- SETUP ----------------
     @app_commands.command(name="welcome_setup", description="Setup welcome system (embed only)")
@@ -40,7 +39,7 @@ class Welcome(commands.Cog):
                 "welcome_message": message
             }
 
-            supabase.table("guild_settings").upsert(data).execute()
+            await guild_settings.update_settings(data)
 
             await interaction.followup.send(
                 "✅ Welcome system configured!\n"
@@ -58,15 +57,12 @@ class Welcome(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            res = supabase.table("guild_settings") \
-                .select("welcome_message") \
-                .eq("guild_id", interaction.guild.id) \
-                .execute()
+            data = await guild_settings.get_settings(interaction.guild.id)
 
-            if not res.data:
+            if not data or not data.get("welcome_message"):
                 return await interaction.followup.send("❌ Welcome not configured.")
 
-            message = res.data[0]["welcome_message"]
+            message = data["welcome_message"]
 
             embed = discord.Embed(
                 title="🎉 Welcome!",
@@ -88,64 +84,41 @@ class Welcome(commands.Cog):
         except Exception as e:
             await interaction.followup.send(f"❌ Error: {e}")
 
+    # ---------------- STATS ----------------
+    @app_commands.command(name="welcome_stats", description="Show welcome queue stats")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def welcome_stats(self, interaction: discord.Interaction):
+        stats = self.pipeline.stats()
+
+        embed = discord.Embed(title="📥 Welcome Queue", color=discord.Color.blue())
+        embed.add_field(name="Depth", value=f"{stats['depth']} (max {stats['max_depth']})")
+        embed.add_field(name="Processed", value=str(stats["processed"]))
+        embed.add_field(
+            name="Roles / DMs",
+            value=f"{stats['roles_granted']} / {stats['dms_sent']} sent "
+                  f"({stats['role_depth']} / {stats['dm_depth']} queued)"
+        )
+        embed.add_field(name="Dropped", value=str(stats["dropped"]))
+        embed.add_field(name="Lag", value=f"avg {stats['avg_lag_ms']} ms / max {stats['max_lag_ms']} ms")
+        embed.add_field(
+            name="Batched",
+            value=f"{stats['batched_members']} members in {stats['batched_messages']} messages"
+        )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     # ---------------- MEMBER JOIN ----------------
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         try:
-            res = supabase.table("guild_settings") \
-                .select("*") \
-                .eq("guild_id", member.guild.id) \
-                .execute()
-
-            if not res.data:
-                return
-
-            data = res.data[0]
-            channel_id = data["welcome_channel"]
-            role_id = data["welcome_role"]
-            message = data["welcome_message"]
+            # served from memory; only the first join per TTL hits the DB
+            data = await guild_settings.get_settings(member.guild.id)
 
-            channel = member.guild.get_channel(channel_id)
-
-            # Auto role
-            role = member.guild.get_role(role_id)
-            if role:
-                try:
-                    await member.add_roles(role)
-                except:
-                    pass
-
-            # DM welcome
-            try:
-                await member.send(
-                    message.format(
-                        user=member.name,
-                        server=member.guild.name
-                    )
-                )
-            except:
-                pass
-
-            if not channel:
+            if not data or not data.get("welcome_message"):
                 return
 
-            embed = discord.Embed(
-                title="🎉 Welcome!",
-                description=message.format(
-                    user=member.name,
-                    server=member.guild.name
-                ),
-                color=discord.Color.gold()
-            )
-
-            embed.set_thumbnail(url=member.display_avatar.url)
-            embed.set_image(url=LOGO_URL)
-            embed.set_footer(text=f"Member #{member.guild.member_count}")
-
-            await channel.send(
-                content=member.mention,
-                embed=embed
-            )
+            # role, DM and channel welcome run on the bounded pipeline
+            self.pipeline.submit(member, data)
 
         except Exception as e:
             print("Welcome error:", e)
@@ -1,17 +1,19 @@
 # cogs/youtube.py
-import discord, os, requests
+import discord, asyncio
 from discord.ext import commands, tasks
 from discord import app_commands
-from supabase import create_client
-
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
-YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+from utils import supabase_db as db
+from utils.youtube_poller import YouTubePoller
 
 class YouTube(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.poller = YouTubePoller(bot.http_session)
         self.check_videos.start()
 
+    async def cog_unload(self):
+        self.check_videos.cancel()
+
     @app_commands.command(name="setup_channel", description="Add YouTube alert")
     @app_commands.checks.has_permissions(administrator=True)
     async def setup_channel(
@@ -21,24 +23,21 @@ class YouTube(commands.Cog):
         discord_channel: discord.TextChannel,
         role: discord.Role = None
     ):
-        supabase.table("youtube_alerts").insert({
-            "guild_id": interaction.guild.id,
-            "youtube_channel": youtube_channel,
-            "discord_channel": discord_channel.id,
-            "role_ping": role.id if role else None,
-            "last_video": ""
-        }).execute()
+        await db.add_youtube_alert(
+            interaction.guild.id,
+            youtube_channel,
+            discord_channel.id,
+            role.id if role else None
+        )
 
         await interaction.response.send_message("✅ YouTube channel added")
 
     @app_commands.command(name="list_channels", description="List YouTube alerts")
     async def list_channels(self, interaction: discord.Interaction):
-        res = supabase.table("youtube_alerts").select("*").eq(
-            "guild_id", interaction.guild.id
-        ).execute()
+        rows = await db.list_youtube_alerts(interaction.guild.id)
 
         embed = discord.Embed(title="📺 YouTube Alerts")
-        for row in res.data:
+        for row in rows:
             embed.add_field(
                 name=row["youtube_channel"],
                 value=f"<#{row['discord_channel']}>",
@@ -49,31 +48,29 @@ class YouTube(commands.Cog):
 
     @tasks.loop(minutes=5)
     async def check_videos(self):
-        rows = supabase.table("youtube_alerts").select("*").execute().data
-
-        for row in rows:
-            url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&channelId={row['youtube_channel']}&order=date&maxResults=1&key={YOUTUBE_API_KEY}"
-            r = requests.get(url).json()
+        rows = await db.list_youtube_alerts()
 
-            if "items" not in r:
-                continue
-
-            video_id = r["items"][0]["id"].get("videoId")
-            if not video_id or video_id == row["last_video"]:
-                continue
+        notifications, changed = await self.poller.run_cycle(rows)
 
-            supabase.table("youtube_alerts").update({
-                "last_video": video_id
-            }).eq("youtube_channel", row["youtube_channel"]).execute()
+        await asyncio.gather(*(
+            db.set_last_video(channel, video_id)
+            for channel, video_id in changed.items()
+        ))
 
+        for row, video_id in notifications:
             guild = self.bot.get_guild(row["guild_id"])
-            channel = guild.get_channel(row["discord_channel"])
+            channel = guild.get_channel(row["discord_channel"]) if guild else None
+            if not channel:
+                continue
 
             ping = f"<@&{row['role_ping']}>" if row["role_ping"] else ""
 
-            await channel.send(
-                f"{ping} 📢 New YouTube video!\nhttps://youtu.be/{video_id}"
-            )
+            try:
+                await channel.send(
+                    f"{ping} 📢 New YouTube video!\nhttps://youtu.be/{video_id}"
+                )
+            except discord.HTTPException as e:
+                print("YouTube alert error:", e)
 
     @check_videos.before_loop
     async def before_loop(self):
@@ -1,14 +1,19 @@
 import discord
 from discord.ext import commands
+import aiohttp
 import asyncio
 import os
 from dotenv import load_dotenv
 
 from utils.db import init_db
+from utils.supabase_pool import close_pool
+from utils import db_helpers
+from utils.render import shutdown_render_pool
 
 load_dotenv()
 
 TOKEN = os.getenv("DISCORD_TOKEN")
+DB_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "8"))
 
 intents = discord.Intents.default()
 intents.members = True
@@ -28,11 +33,17 @@ COGS = [
 class MyBot(commands.Bot):
     def __init__(self):
         super().__init__(command_prefix="!", intents=intents)
+        self.db_pool = None
+        self.http_session = None
 
     async def setup_hook(self):
-        await init_db()
+        # single shared Supabase client + connection pool for every cog
+        self.db_pool = await init_db(pool_size=DB_POOL_SIZE)
         print("✅ Database initialized")
 
+        # shared keep-alive HTTP session for outbound fetches (feeds, images)
+        self.http_session = aiohttp.ClientSession()
+
         for cog in COGS:
             try:
                 await self.load_extension(cog)
@@ -43,6 +54,21 @@ class MyBot(commands.Bot):
         await self.tree.sync()
         print("✅ Slash commands synced")
 
+    async def close(self):
+        # unload cogs first so write-behind buffers flush before the pool goes
+        for ext in list(self.extensions):
+            try:
+                await self.unload_extension(ext)
+            except Exception as e:
+                print(f"❌ Failed to unload {ext}: {e}")
+
+        await super().close()
+        if self.http_session:
+            await self.http_session.close()
+        await db_helpers.close()
+        close_pool()
+        shutdown_render_pool()
+
 
 bot = MyBot()
 
@@ -0,0 +1,36 @@
+-- backup: every backed-up table carries updated_at so incremental backups
+-- can select just the rows changed since the last watermark.
+create or replace function set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$;
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array[
+        'coins', 'premium', 'welcome_config', 'tickets',
+        'payments', 'coupons', 'announcements'
+    ]
+    loop
+        execute format(
+            'alter table %I add column if not exists updated_at timestamptz not null default now()', t
+        );
+        execute format(
+            'create index if not exists %I on %I (updated_at)', t || '_updated_at_idx', t
+        );
+        execute format('drop trigger if exists %I on %I', t || '_set_updated_at', t);
+        execute format(
+            'create trigger %I before insert or update on %I '
+            'for each row execute function set_updated_at()',
+            t || '_set_updated_at', t
+        );
+    end loop;
+end;
+$$;
@@ -0,0 +1,82 @@
+-- coin ledger: every coin mutation is one round-trip and race-free.
+-- Called through supabase.rpc(...) by utils/coin_ledger.py.
+
+-- credit (or create) a balance, returns the new balance
+create or replace function coins_add(p_user_id bigint, p_amount bigint)
+returns bigint
+language sql
+as $$
+    insert into coins (user_id, balance)
+    values (p_user_id, p_amount)
+    on conflict (user_id)
+    do update set balance = coins.balance + excluded.balance
+    returning balance;
+$$;
+
+-- debit a balance; returns the new balance, or null when it can't be afforded.
+-- with p_clamp the balance is floored at zero instead of refusing.
+create or replace function coins_remove(p_user_id bigint, p_amount bigint, p_clamp boolean default false)
+returns bigint
+language plpgsql
+as $$
+declare
+    new_balance bigint;
+begin
+    if p_clamp then
+        update coins
+           set balance = greatest(balance - p_amount, 0)
+         where user_id = p_user_id
+        returning balance into new_balance;
+        return coalesce(new_balance, 0);
+    end if;
+
+    update coins
+       set balance = balance - p_amount
+     where user_id = p_user_id
+       and balance >= p_amount
+    returning balance into new_balance;
+    return new_balance;
+end;
+$$;
+
+-- move coins between two users in one transaction; returns no row when the
+-- sender can't afford it. rows are locked in user_id order so opposing
+-- transfers can't deadlock.
+create or replace function coins_transfer(p_sender bigint, p_receiver bigint, p_amount bigint)
+returns table (sender_balance bigint, receiver_balance bigint)
+language plpgsql
+as $$
+declare
+    s bigint;
+    r bigint;
+begin
+    if p_sender = p_receiver or p_amount <= 0 then
+        return;
+    end if;
+
+    perform 1 from coins
+     where user_id in (p_sender, p_receiver)
+     order by user_id
+       for update;
+
+    update coins
+       set balance = balance - p_amount
+     where user_id = p_sender
+       and balance >= p_amount
+    returning balance into s;
+
+    if s is null then
+        return;
+    end if;
+
+    insert into coins (user_id, balance)
+    values (p_receiver, p_amount)
+    on conflict (user_id)
+    do update set balance = coins.balance + excluded.balance
+    returning balance into r;
+
+    sender_balance := s;
+    receiver_balance := r;
+    return next;
+end;
+$$;
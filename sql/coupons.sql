@@ -0,0 +1,64 @@
+-- coupon_redemptions: one row per (coupon, user), so nobody redeems twice
+create table if not exists coupon_redemptions (
+    code text not null,
+    user_id bigint not null,
+    redeemed_at bigint not null
+);
+
+create unique index if not exists coupon_redemptions_code_user_key
+    on coupon_redemptions (code, user_id);
+
+-- redeem a coupon in one round-trip: dedupe, conditional usage increment
+-- and coin credit all commit together or not at all.
+-- status is one of: ok, invalid, expired, exhausted, already_redeemed.
+create or replace function redeem_coupon(p_code text, p_user_id bigint, p_now bigint)
+returns table (status text, value bigint, balance bigint)
+language plpgsql
+as $$
+declare
+    v_value bigint;
+    v_balance bigint;
+begin
+    -- per-user dedupe first: touches only this user's index entry, so the
+    -- hot coupon row below is locked for as short a time as possible
+    insert into coupon_redemptions (code, user_id, redeemed_at)
+    values (p_code, p_user_id, p_now)
+    on conflict (code, user_id) do nothing;
+
+    if not found then
+        return query select 'already_redeemed'::text, null::bigint, null::bigint;
+        return;
+    end if;
+
+    -- the guard makes the increment itself the usage check; concurrent
+    -- redeemers queue on the row lock and can never push used past max_uses
+    update coupons
+       set used = used + 1
+     where code = p_code
+       and used < max_uses
+       and expires >= p_now
+    returning coupons.value into v_value;
+
+    if not found then
+        delete from coupon_redemptions where code = p_code and user_id = p_user_id;
+        return query
+            select case
+                       when c.code is null then 'invalid'
+                       when c.expires < p_now then 'expired'
+                       else 'exhausted'
+                   end,
+                   null::bigint, null::bigint
+              from (select 1) as one
+              left join coupons c on c.code = p_code;
+        return;
+    end if;
+
+    insert into coins as c (user_id, balance)
+    values (p_user_id, v_value)
+    on conflict (user_id)
+    do update set balance = c.balance + excluded.balance
+    returning c.balance into v_balance;
+
+    return query select 'ok'::text, v_value, v_balance;
+end;
+$$;
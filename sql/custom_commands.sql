@@ -0,0 +1,6 @@
+-- custom_commands: scope commands per guild (null guild_id = legacy, global)
+alter table custom_commands add column if not exists guild_id bigint;
+alter table custom_commands drop constraint if exists custom_commands_pkey;
+alter table custom_commands add column if not exists id bigserial primary key;
+create unique index if not exists custom_commands_guild_name_key
+    on custom_commands (guild_id, name);
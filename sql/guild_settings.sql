@@ -0,0 +1,2 @@
+-- guild_settings: per-guild XP cooldown in seconds (null = bot default)
+alter table guild_settings add column if not exists xp_cooldown integer;
@@ -0,0 +1,3 @@
+-- levels: one row per (guild, member) so the XP buffer can bulk upsert
+create unique index if not exists levels_guild_user_key
+    on levels (guild_id, user_id);
@@ -0,0 +1,35 @@
+-- payments: one row per invoice, so confirmations are idempotent
+create unique index if not exists payments_invoice_id_key
+    on payments (invoice_id);
+
+-- record a payment and credit its coins in one transaction.
+-- retrying with the same invoice id is a no-op that returns credited = false.
+create or replace function confirm_payment(
+    p_invoice_id text,
+    p_user_id bigint,
+    p_rupees bigint,
+    p_coins bigint,
+    p_timestamp bigint
+)
+returns table (balance bigint, credited boolean)
+language plpgsql
+as $$
+begin
+    insert into payments (invoice_id, user_id, rupees, coins, timestamp)
+    values (p_invoice_id, p_user_id, p_rupees, p_coins, p_timestamp)
+    on conflict (invoice_id) do nothing;
+
+    if not found then
+        return query
+            select coalesce((select c.balance from coins c where c.user_id = p_user_id), 0::bigint), false;
+        return;
+    end if;
+
+    return query
+        insert into coins as c (user_id, balance)
+        values (p_user_id, p_coins)
+        on conflict (user_id)
+        do update set balance = c.balance + excluded.balance
+        returning c.balance, true;
+end;
+$$;
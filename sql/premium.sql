@@ -0,0 +1,3 @@
+-- premium: the expiry scheduler range-scans on expires
+create index if not exists premium_expires_idx
+    on premium (expires);
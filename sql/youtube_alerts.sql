@@ -0,0 +1,3 @@
+-- youtube_alerts: last_video is updated per youtube channel across all guilds
+create index if not exists youtube_alerts_channel_idx
+    on youtube_alerts (youtube_channel);
@@ -1,41 +1,194 @@
+import asyncio
 import shutil
+import sqlite3
 import time
 import os
 
+from utils.chunk_store import ChunkStore
+
 DB_FILE = "bot.db"
 BACKUP_DIR = "db_backups"
+STORE_DIR = os.path.join(BACKUP_DIR, "store")
 
 # ===============================
 # CONFIG
 # ===============================
-MAX_BACKUPS = 50   # keep latest 50 backups only
+MAX_BACKUPS = 50   # legacy whole-file copies; snapshots use the store's GFS retention
+BACKUP_STEP_PAGES = 256   # pages copied per online-backup step
+BACKUP_STEP_PAUSE = 0.005 # seconds between steps, so writers get the lock
+
+_store = None
+_pause_hooks = []   # async callables run around a restore, see register_reopen_hook
+_resume_hooks = []
+
+
+def register_reopen_hook(pause, resume):
+    # `pause` must close every connection to DB_FILE, `resume` reopens them
+    _pause_hooks.append(pause)
+    _resume_hooks.append(resume)
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = ChunkStore(STORE_DIR)
+    return _store
+
+# ===============================
+# ONLINE COPY
+# ===============================
+# SQLite's backup API copies a consistent image of the live database a few
+# pages at a time; a plain file copy could tear mid-write.
+#
+# WAL (what utils/db_helpers.py runs in): an open read transaction pins one
+# snapshot for the whole copy without blocking writers, so the copy never
+# restarts. Rollback journal: a read transaction would block writers for
+# the whole copy, so steps run unpinned (writers get the lock between
+# steps) and only a copy that keeps restarting falls back to pinning.
+MAX_RESTARTS = 5
+
+
+class _Restarted(Exception):
+    pass
+
+
+def _online_copy(src, dest):
+    source = sqlite3.connect(src, isolation_level=None)
+    try:
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        if wal:
+            _stepped_copy(source, dest, pinned=True)
+            return
+        try:
+            _stepped_copy(source, dest, pinned=False)
+        except _Restarted:
+            _stepped_copy(source, dest, pinned=True)
+    finally:
+        source.close()
+
+
+def _stepped_copy(source, dest, pinned):
+    restarts = 0
+    last = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last
+        # a write from another connection restarts the copy from page 1
+        if last is not None and remaining > last:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise _Restarted()
+        last = remaining
+        time.sleep(BACKUP_STEP_PAUSE)
+
+    target = sqlite3.connect(dest)
+    try:
+        if pinned:
+            source.execute("BEGIN")
+            source.execute("SELECT count(*) FROM sqlite_master")
+        source.backup(target, pages=BACKUP_STEP_PAGES, progress=progress, sleep=BACKUP_STEP_PAUSE)
+    finally:
+        if pinned:
+            source.execute("COMMIT")
+        target.close()
+
+
+def _check(path):
+    con = sqlite3.connect(path)
+    try:
+        result = con.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        con.close()
+    if result != "ok":
+        raise sqlite3.DatabaseError(f"Backup failed integrity check: {result}")
 
 # ===============================
 # CREATE BACKUP
 # ===============================
+# A consistent copy is chunked into the store, where only blocks that
+# changed since any earlier snapshot are written.
 def backup_db():
     if not os.path.exists(DB_FILE):
         raise FileNotFoundError("bot.db not found")
 
-    os.makedirs(BACKUP_DIR, exist_ok=True)
-
-    ts = time.strftime("%Y%m%d_%H%M%S")
-    backup_path = os.path.join(BACKUP_DIR, f"bot_{ts}.db")
+    store = get_store()
+    tmp = os.path.join(BACKUP_DIR, f".snapshot_{os.getpid()}.db")
+    try:
+        _online_copy(DB_FILE, tmp)
+        entry = store.put_file(tmp)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
 
-    shutil.copyfile(DB_FILE, backup_path)
+    snapshot_id = store.save_snapshot({
+        "kind": "full",
+        "type": "file",
+        "files": {os.path.basename(DB_FILE): entry},
+        "size": entry["size"],
+        "stored": entry["stored"]
+    })
 
     cleanup_old_backups()
-    return backup_path
+    return snapshot_id
+
+
+async def snapshot_db():
+    # off the event loop; the copy itself only holds the lock per step
+    return await asyncio.to_thread(backup_db)
 
 # ===============================
 # RESTORE BACKUP
 # ===============================
-def restore_backup(filename: str):
-    path = os.path.join(BACKUP_DIR, filename)
-    if not os.path.exists(path):
-        raise FileNotFoundError("Backup file not found")
+# The backup is rebuilt next to bot.db, checked, and swapped in with one
+# os.replace, so the live file is never half-written.
+def _materialize(name):
+    tmp = DB_FILE + ".restore"
+    # legacy bot_<ts>.db copies
+    if name.endswith(".db"):
+        path = os.path.join(BACKUP_DIR, name)
+        if not os.path.exists(path):
+            raise FileNotFoundError("Backup file not found")
+        shutil.copyfile(path, tmp)
+    else:
+        store = get_store()
+        try:
+            manifest = store.load_snapshot(name)
+        except FileNotFoundError:
+            raise FileNotFoundError("Backup file not found")
+        store.write_file(manifest["files"][os.path.basename(DB_FILE)], tmp)
+
+    try:
+        _check(tmp)
+    except Exception:
+        os.remove(tmp)
+        raise
+    return tmp
 
-    shutil.copyfile(path, DB_FILE)
+
+def _swap(tmp):
+    # WAL/SHM files belong to the old database and would corrupt the new one
+    for suffix in ("-wal", "-shm", "-journal"):
+        if os.path.exists(DB_FILE + suffix):
+            os.remove(DB_FILE + suffix)
+    os.replace(tmp, DB_FILE)
+
+
+def restore_backup(name: str):
+    # offline restore; with the bot running use restore_db()
+    _swap(_materialize(name))
+
+
+async def restore_db(name: str):
+    tmp = await asyncio.to_thread(_materialize, name)
+
+    # connections are closed only for the swap itself
+    for pause in _pause_hooks:
+        await pause()
+    try:
+        await asyncio.to_thread(_swap, tmp)
+    finally:
+        for resume in _resume_hooks:
+            await resume()
 
 # ===============================
 # LIST BACKUPS WITH SIZE
@@ -44,21 +197,32 @@ def list_backups_with_size():
     if not os.path.exists(BACKUP_DIR):
         return []
 
-    backups = []
+    # logical size of each snapshot; shared blocks are only stored once
+    backups = [
+        (snap["id"], round(snap["size"] / (1024 * 1024), 2))
+        for snap in get_store().list_snapshots()
+        if snap.get("type") == "file"
+    ]
+
+    legacy = []
     for f in os.listdir(BACKUP_DIR):
         if f.endswith(".db"):
             path = os.path.join(BACKUP_DIR, f)
             size_mb = os.path.getsize(path) / (1024 * 1024)
-            backups.append((f, round(size_mb, 2)))
+            legacy.append((f, round(size_mb, 2)))
 
-    # newest first
-    backups.sort(reverse=True)
-    return backups
+    # newest first; snapshots already are, and postdate any legacy copy
+    legacy.sort(reverse=True)
+    return backups + legacy
 
 # ===============================
 # AUTO CLEANUP OLD BACKUPS
 # ===============================
 def cleanup_old_backups():
+    store = get_store()
+    store.apply_retention()
+    store.gc()
+
     files = sorted(
         [f for f in os.listdir(BACKUP_DIR) if f.endswith(".db")],
         reverse=True
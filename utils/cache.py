@@ -0,0 +1,73 @@
+from collections import OrderedDict
+import asyncio, time
+
+_MISSING = object()
+
+
+# ===============================
+# TTL CACHE
+# ===============================
+# Read-through cache with per-entry expiry, LRU size cap and explicit
+# invalidation. Concurrent misses for the same key share one load, and
+# `None` results are cached too so unconfigured keys stay DB-free.
+class TTLCache:
+    def __init__(self, ttl, max_size=10_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            return default
+        return item[1]
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+        # an in-flight load may have read the old row; don't let it be cached
+        self._loading.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+        self._loading.clear()
+
+    async def get_or_load(self, key, load):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        pending = self._loading.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(load())
+            self._loading[key] = pending
+            try:
+                value = await pending
+            finally:
+                fresh = self._loading.get(key) is pending
+                if fresh:
+                    del self._loading[key]
+            if fresh:
+                self.set(key, value)
+            return value
+
+        return await pending
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
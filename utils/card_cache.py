@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from utils.render import run_render
+import asyncio
+
+# ===============================
+# CONFIG
+# ===============================
+CARD_CACHE_BYTES = 64 * 1024 * 1024
+AVATAR_CACHE_BYTES = 32 * 1024 * 1024
+AVATAR_FETCH_SIZE = 256
+
+
+# ===============================
+# BYTE-BOUNDED LRU
+# ===============================
+class BytesLRU:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        data = self._data.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def set(self, key, data):
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._data[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes and self._data:
+            _, evicted = self._data.popitem(last=False)
+            self.size -= len(evicted)
+
+
+# ===============================
+# RENDER CACHE
+# ===============================
+# Finished PNGs keyed by everything that changes the pixels, so unchanged
+# cards are never sent to the render pool twice. Concurrent requests for
+# the same card share one render.
+class CardCache:
+    def __init__(self, max_bytes=CARD_CACHE_BYTES):
+        self._lru = BytesLRU(max_bytes)
+        self._rendering = {}
+
+    async def get_or_render(self, key, fn, *args):
+        png = self._lru.get(key)
+        if png is not None:
+            return png
+
+        pending = self._rendering.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(run_render(fn, *args))
+            self._rendering[key] = pending
+            try:
+                png = await pending
+            finally:
+                self._rendering.pop(key, None)
+            self._lru.set(key, png)
+            return png
+
+        return await pending
+
+
+# ===============================
+# AVATAR CACHE
+# ===============================
+# Avatar bytes keyed by (user id, avatar hash); a changed avatar gets a new
+# hash, so entries never need invalidating.
+class AvatarCache:
+    def __init__(self, max_bytes=AVATAR_CACHE_BYTES):
+        self._lru = BytesLRU(max_bytes)
+        self._loading = {}
+
+    async def get(self, user):
+        asset = user.display_avatar
+        key = (user.id, asset.key)
+        data = self._lru.get(key)
+        if data is not None:
+            return data, asset.key
+
+        pending = self._loading.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                asset.replace(size=AVATAR_FETCH_SIZE, static_format="png").read()
+            )
+            self._loading[key] = pending
+            try:
+                data = await pending
+            finally:
+                self._loading.pop(key, None)
+            self._lru.set(key, data)
+        else:
+            data = await pending
+
+        return data, asset.key
@@ -0,0 +1,110 @@
+from PIL import Image, ImageDraw, ImageFont
+from io import BytesIO
+from utils.themes import DEFAULT_FONTS
+
+# ===============================
+# CONFIG
+# ===============================
+PNG_COMPRESS_LEVEL = 1
+
+RANK_SIZE = (900, 260)
+AVATAR_SIZE = 180
+BOARD_WIDTH = 900
+BOARD_HEADER = 90
+BOARD_ROW = 56
+BAR_STEPS = 50   # progress bar resolution; also the XP bucket for card caching
+
+# per-process, like utils/invoice.py: (path, size) -> font
+_fonts = {}
+
+
+def _font(spec):
+    font = _fonts.get(spec)
+    if font is None:
+        path, size = spec
+        try:
+            font = ImageFont.truetype(path, size)
+        except OSError:
+            font = ImageFont.load_default()
+        _fonts[spec] = font
+    return font
+
+
+def load_fonts():
+    for spec in DEFAULT_FONTS.values():
+        _font(spec)
+
+
+def xp_bucket(xp, level):
+    return min(BAR_STEPS, xp * BAR_STEPS // max(level * 100, 1))
+
+
+def _encode(img):
+    buf = BytesIO()
+    img.save(buf, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return buf.getvalue()
+
+
+def _avatar(data):
+    with Image.open(BytesIO(data)) as raw:
+        avatar = raw.convert("RGBA").resize((AVATAR_SIZE, AVATAR_SIZE))
+    mask = Image.new("L", avatar.size, 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, AVATAR_SIZE, AVATAR_SIZE), fill=255)
+    avatar.putalpha(mask)
+    return avatar
+
+
+# ===============================
+# RANK CARD
+# ===============================
+# `theme` is a utils.themes entry, passed in whole so custom themes need
+# no registry inside the worker processes.
+def render_rank_card(username, level, bucket, theme, avatar_bytes):
+    colors, fonts = theme["colors"], theme["fonts"]
+
+    img = Image.new("RGB", RANK_SIZE, colors["bg"])
+    draw = ImageDraw.Draw(img)
+    draw.rounded_rectangle((15, 15, RANK_SIZE[0] - 15, RANK_SIZE[1] - 15), 20, fill=colors["panel"])
+
+    if avatar_bytes:
+        try:
+            avatar = _avatar(avatar_bytes)
+            img.paste(avatar, (40, 40), avatar)
+        except OSError:
+            pass
+    draw.ellipse((38, 38, 42 + AVATAR_SIZE, 42 + AVATAR_SIZE), outline=colors["accent"], width=4)
+
+    draw.text((250, 45), username, font=_font(fonts["title"]), fill=colors["text"])
+    draw.text((250, 110), f"Level {level}", font=_font(fonts["body"]), fill=colors["muted"])
+
+    left, top, right, bottom = 250, 170, 860, 200
+    draw.rounded_rectangle((left, top, right, bottom), 15, fill=colors["bg"])
+    if bucket:
+        fill = left + (right - left) * bucket // BAR_STEPS
+        draw.rounded_rectangle((left, top, max(fill, left + 30), bottom), 15, fill=colors["accent"])
+
+    return _encode(img)
+
+
+# ===============================
+# LEADERBOARD CARD
+# ===============================
+def render_leaderboard_card(title, rows, theme):
+    # rows: [(rank, name, level, xp, accent)], accent being each member's own theme colour
+    colors, fonts = theme["colors"], theme["fonts"]
+
+    height = BOARD_HEADER + BOARD_ROW * len(rows) + 20
+    img = Image.new("RGB", (BOARD_WIDTH, height), colors["bg"])
+    draw = ImageDraw.Draw(img)
+
+    draw.text((40, 25), title, font=_font(fonts["title"]), fill=colors["accent"])
+
+    for i, (rank, name, level, xp, accent) in enumerate(rows):
+        y = BOARD_HEADER + i * BOARD_ROW
+        draw.rounded_rectangle((25, y, BOARD_WIDTH - 25, y + BOARD_ROW - 8), 12, fill=colors["panel"])
+        draw.rectangle((25, y + 8, 31, y + BOARD_ROW - 16), fill=accent)
+        draw.text((45, y + 10), f"#{rank}", font=_font(fonts["body"]), fill=colors["accent"])
+        draw.text((140, y + 12), name[:24], font=_font(fonts["small"]), fill=colors["text"])
+        draw.text((600, y + 12), f"Lvl {level}  •  {xp} XP", font=_font(fonts["small"]), fill=colors["muted"])
+
+    return _encode(img)
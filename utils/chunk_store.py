@@ -0,0 +1,216 @@
+import gzip, hashlib, json, os, time, zlib
+
+# ===============================
+# CONFIG
+# ===============================
+# rows: content-defined boundaries, so inserting or deleting a row only
+# changes the chunk it lands in instead of shifting every chunk after it
+MIN_ROWS = 32
+MAX_ROWS = 2048
+BOUNDARY_MASK = 0xFF          # ~1 boundary per 256 rows on average
+
+# files: bot.db is rewritten page-in-place, so fixed, page-aligned blocks
+# already dedupe well and are far cheaper than rolling hashes in Python
+FILE_BLOCK = 64 * 1024
+
+COMPRESS_LEVEL = 6
+GC_GRACE = 3600               # unreferenced chunks younger than this are kept
+
+RETENTION = {"hourly": 24, "daily": 7, "weekly": 4}
+
+
+# ===============================
+# CHUNK STORE
+# ===============================
+# root/chunks/ab/<sha256>  gzip'd chunk, named by the hash of its content
+# root/snapshots/<id>.json manifest listing the chunks of one snapshot
+#
+# Each chunk is written once however many snapshots reference it, so disk
+# use grows with churn rather than with the number of snapshots.
+class ChunkStore:
+    def __init__(self, root):
+        self.root = root
+        self.chunk_dir = os.path.join(root, "chunks")
+        self.snapshot_dir = os.path.join(root, "snapshots")
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+    # ---------- chunks ----------
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def put(self, data):
+        # returns (digest, bytes written); 0 bytes when the chunk already exists
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            # refresh mtime so a concurrent gc() can't sweep a chunk that a
+            # snapshot in progress is about to reference
+            os.utime(path)
+            return digest, 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+        tmp = f"{path}.{os.getpid()}.part"
+        with open(tmp, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp, path)
+        return digest, len(compressed)
+
+    def get(self, digest):
+        with open(self._chunk_path(digest), "rb") as f:
+            data = gzip.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Chunk {digest[:12]} is corrupt")
+        return data
+
+    # ---------- rows ----------
+    def row_writer(self):
+        return RowChunker(self)
+
+    def iter_rows(self, digests):
+        for digest in digests:
+            for line in self.get(digest).splitlines():
+                yield json.loads(line)
+
+    # ---------- files ----------
+    def put_file(self, path, block_size=FILE_BLOCK):
+        digests, stored, size = [], 0, 0
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                digest, written = self.put(block)
+                digests.append(digest)
+                stored += written
+                size += len(block)
+        return {"size": size, "stored": stored, "chunks": digests}
+
+    def write_file(self, entry, dest):
+        with open(dest, "wb") as f:
+            for digest in entry["chunks"]:
+                f.write(self.get(digest))
+
+    # ---------- snapshots ----------
+    def save_snapshot(self, manifest):
+        created = manifest.setdefault("created", int(time.time()))
+        base = time.strftime("%Y%m%d_%H%M%S", time.gmtime(created))
+        snapshot_id, n = base, 1
+        while os.path.exists(self._snapshot_path(snapshot_id)):
+            n += 1
+            snapshot_id = f"{base}_{n}"
+
+        manifest["id"] = snapshot_id
+        path = self._snapshot_path(snapshot_id)
+        with open(path + ".part", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".part", path)
+        return snapshot_id
+
+    def _snapshot_path(self, snapshot_id):
+        return os.path.join(self.snapshot_dir, f"{snapshot_id}.json")
+
+    def load_snapshot(self, snapshot_id):
+        with open(self._snapshot_path(snapshot_id), encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_snapshots(self):
+        # newest first
+        snapshots = [
+            self.load_snapshot(name[:-5])
+            for name in os.listdir(self.snapshot_dir) if name.endswith(".json")
+        ]
+        return sorted(snapshots, key=lambda s: (s["created"], s["id"]), reverse=True)
+
+    def delete_snapshot(self, snapshot_id):
+        os.remove(self._snapshot_path(snapshot_id))
+
+    # ---------- retention ----------
+    def apply_retention(self, hourly=RETENTION["hourly"], daily=RETENTION["daily"], weekly=RETENTION["weekly"]):
+        # grandfather-father-son: the newest snapshot of each of the last
+        # `hourly` hours, `daily` days and `weekly` ISO weeks survives
+        snapshots = self.list_snapshots()
+        keep = {s["id"] for s in snapshots[:1]}
+        for fmt, limit in (("%Y%m%d%H", hourly), ("%Y%m%d", daily), ("%G%V", weekly)):
+            buckets = set()
+            for snap in snapshots:
+                bucket = time.strftime(fmt, time.gmtime(snap["created"]))
+                if bucket in buckets:
+                    continue
+                if len(buckets) >= limit:
+                    break
+                buckets.add(bucket)
+                keep.add(snap["id"])
+
+        removed = [s["id"] for s in snapshots if s["id"] not in keep]
+        for snapshot_id in removed:
+            self.delete_snapshot(snapshot_id)
+        return removed
+
+    def gc(self, grace=GC_GRACE):
+        # mark every chunk a surviving manifest references, sweep the rest
+        referenced = set()
+        for snap in self.list_snapshots():
+            for digests in snap.get("chunks", {}).values():
+                referenced.update(digests)
+            for entry in snap.get("files", {}).values():
+                referenced.update(entry["chunks"])
+
+        cutoff = time.time() - grace
+        removed = freed = 0
+        for prefix in os.listdir(self.chunk_dir):
+            folder = os.path.join(self.chunk_dir, prefix)
+            for name in os.listdir(folder):
+                if name in referenced or name.endswith(".part"):
+                    continue
+                path = os.path.join(folder, name)
+                stat = os.stat(path)
+                if stat.st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+                    freed += stat.st_size
+        return removed, freed
+
+    def disk_usage(self):
+        total = 0
+        for folder, _, names in os.walk(self.chunk_dir):
+            total += sum(os.path.getsize(os.path.join(folder, n)) for n in names)
+        return total
+
+
+# ===============================
+# ROW CHUNKER
+# ===============================
+# Rows are serialized canonically (sorted keys) so an unchanged row always
+# produces the same bytes, and a boundary is cut after any row whose hash
+# hits BOUNDARY_MASK.
+class RowChunker:
+    def __init__(self, store):
+        self.store = store
+        self.chunks = []
+        self.size = 0
+        self.stored = 0
+        self._lines = []
+
+    def add(self, rows):
+        for row in rows:
+            line = json.dumps(row, sort_keys=True, separators=(",", ":"), default=str).encode()
+            self._lines.append(line)
+            if len(self._lines) >= MAX_ROWS or (
+                len(self._lines) >= MIN_ROWS and zlib.crc32(line) & BOUNDARY_MASK == 0
+            ):
+                self._cut()
+
+    def _cut(self):
+        data = b"\n".join(self._lines)
+        self._lines = []
+        digest, written = self.store.put(data)
+        self.chunks.append(digest)
+        self.size += len(data)
+        self.stored += written
+
+    def finish(self):
+        if self._lines:
+            self._cut()
+        return self.chunks
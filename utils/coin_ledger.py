@@ -0,0 +1,176 @@
+from utils import supabase_db as db
+from utils import db_helpers
+from utils.leaderboard import Leaderboard
+import os
+
+# "supabase" (default) uses the RPCs in sql/coin_ledger.sql and sql/coupons.sql,
+# "sqlite" uses the local bot.db stand-in in utils/db_helpers.py
+COIN_BACKEND = os.getenv("COIN_BACKEND", "supabase")
+
+
+# ===============================
+# SUPABASE LEDGER
+# ===============================
+class SupabaseLedger:
+    async def get(self, user_id):
+        return await db.get_coins(user_id)
+
+    async def add(self, user_id, amount):
+        return await db.rpc("coins_add", {
+            "p_user_id": user_id,
+            "p_amount": amount
+        })
+
+    async def remove(self, user_id, amount, clamp=False):
+        return await db.rpc("coins_remove", {
+            "p_user_id": user_id,
+            "p_amount": amount,
+            "p_clamp": clamp
+        })
+
+    async def transfer(self, sender_id, receiver_id, amount):
+        rows = await db.rpc("coins_transfer", {
+            "p_sender": sender_id,
+            "p_receiver": receiver_id,
+            "p_amount": amount
+        })
+        if not rows:
+            return None
+        return rows[0]["sender_balance"], rows[0]["receiver_balance"]
+
+    async def credit_payment(self, invoice_id, user_id, rupees, coins, timestamp):
+        rows = await db.rpc("confirm_payment", {
+            "p_invoice_id": invoice_id,
+            "p_user_id": user_id,
+            "p_rupees": rupees,
+            "p_coins": coins,
+            "p_timestamp": timestamp
+        })
+        return rows[0]["balance"], rows[0]["credited"]
+
+    async def top(self, limit):
+        return await db.top_coins(limit)
+
+    async def create_coupon(self, code, value, max_uses, expires):
+        await db.create_coupon(code, value, max_uses, expires)
+
+    async def list_coupons(self, now):
+        return await db.list_coupons(now)
+
+    async def redeem_coupon(self, code, user_id, now):
+        rows = await db.rpc("redeem_coupon", {
+            "p_code": code,
+            "p_user_id": user_id,
+            "p_now": now
+        })
+        return rows[0]["status"], rows[0]["value"], rows[0]["balance"]
+
+
+# ===============================
+# SQLITE LEDGER
+# ===============================
+class SQLiteLedger:
+    async def get(self, user_id):
+        return await db_helpers.get_coins(user_id)
+
+    async def add(self, user_id, amount):
+        return await db_helpers.add_coins(user_id, amount)
+
+    async def remove(self, user_id, amount, clamp=False):
+        return await db_helpers.remove_coins(user_id, amount, clamp)
+
+    async def transfer(self, sender_id, receiver_id, amount):
+        if sender_id == receiver_id or amount <= 0:
+            return None
+        return await db_helpers.transfer_coins(sender_id, receiver_id, amount)
+
+    async def credit_payment(self, invoice_id, user_id, rupees, coins, timestamp):
+        return await db_helpers.credit_payment(invoice_id, user_id, rupees, coins, timestamp)
+
+    async def top(self, limit):
+        return await db_helpers.top_coins(limit)
+
+    async def create_coupon(self, code, value, max_uses, expires):
+        await db_helpers.create_coupon(code, value, max_uses, expires)
+
+    async def list_coupons(self, now):
+        return await db_helpers.list_coupons(now)
+
+    async def redeem_coupon(self, code, user_id, now):
+        return await db_helpers.redeem_coupon(code, user_id, now)
+
+
+# ===============================
+# LEADERBOARD TRACKING
+# ===============================
+# Every ledger call already returns the new balance, so the global coin
+# board is kept current without any extra reads.
+class TrackedLedger:
+    def __init__(self, backend, board):
+        self.backend = backend
+        self.board = board
+
+    def _track(self, user_id, balance):
+        if balance is not None:
+            self.board.update(None, user_id, {"user_id": user_id, "balance": balance})
+
+    async def get(self, user_id):
+        return await self.backend.get(user_id)
+
+    async def add(self, user_id, amount):
+        balance = await self.backend.add(user_id, amount)
+        self._track(user_id, balance)
+        return balance
+
+    async def remove(self, user_id, amount, clamp=False):
+        balance = await self.backend.remove(user_id, amount, clamp)
+        self._track(user_id, balance)
+        return balance
+
+    async def transfer(self, sender_id, receiver_id, amount):
+        result = await self.backend.transfer(sender_id, receiver_id, amount)
+        if result is not None:
+            self._track(sender_id, result[0])
+            self._track(receiver_id, result[1])
+        return result
+
+    async def credit_payment(self, invoice_id, user_id, rupees, coins, timestamp):
+        balance, credited = await self.backend.credit_payment(
+            invoice_id, user_id, rupees, coins, timestamp
+        )
+        if credited:
+            self._track(user_id, balance)
+        return balance, credited
+
+    async def top(self, limit):
+        return await self.backend.top(limit)
+
+    async def create_coupon(self, code, value, max_uses, expires):
+        await self.backend.create_coupon(code, value, max_uses, expires)
+
+    async def list_coupons(self, now):
+        return await self.backend.list_coupons(now)
+
+    async def redeem_coupon(self, code, user_id, now):
+        status, value, balance = await self.backend.redeem_coupon(code, user_id, now)
+        self._track(user_id, balance)
+        return status, value, balance
+
+
+# ===============================
+# REGISTRY
+# ===============================
+_ledger = None
+
+coin_leaderboard = Leaderboard(
+    lambda scope, limit: get_ledger().top(limit),
+    score="balance"
+)
+
+
+def get_ledger():
+    global _ledger
+    if _ledger is None:
+        backend = SQLiteLedger() if COIN_BACKEND == "sqlite" else SupabaseLedger()
+        _ledger = TrackedLedger(backend, coin_leaderboard)
+    return _ledger
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+import time
+
+# ===============================
+# CONFIG
+# ===============================
+MAX_TRACKED = 100_000   # hard cap on remembered keys
+MAX_WINDOW = 3600       # longest cooldown a guild may configure (seconds)
+
+
+# ===============================
+# COOLDOWN TRACKER
+# ===============================
+# LRU dict of key -> last award time. Keys are kept in award order, so
+# everything older than MAX_WINDOW sits at the front and is dropped in
+# amortised O(1) on each call; the size cap bounds memory under spam.
+class CooldownTracker:
+    def __init__(self, max_size=MAX_TRACKED, max_window=MAX_WINDOW):
+        self.max_size = max_size
+        self.max_window = max_window
+        self._last = OrderedDict()
+        self.allowed = 0
+        self.blocked = 0
+
+    def try_acquire(self, key, window, now=None):
+        now = time.monotonic() if now is None else now
+        self._evict(now)
+
+        last = self._last.get(key)
+        if last is not None and now - last < window:
+            self.blocked += 1
+            return False
+
+        self._last[key] = now
+        self._last.move_to_end(key)
+        if len(self._last) > self.max_size:
+            self._last.popitem(last=False)
+
+        self.allowed += 1
+        return True
+
+    def reset(self, key):
+        self._last.pop(key, None)
+
+    def _evict(self, now):
+        last = self._last
+        while last:
+            key, ts = next(iter(last.items()))
+            if now - ts < self.max_window:
+                break
+            last.popitem(last=False)
+
+    def __len__(self):
+        return len(self._last)
@@ -0,0 +1,116 @@
+from collections import OrderedDict
+import heapq, time
+
+# ===============================
+# CONFIG
+# ===============================
+NEGATIVE_SIZE = 50_000   # unknown codes remembered before the index loads
+NEGATIVE_TTL = 300       # seconds an unknown code stays rejected
+EXPIRED_GRACE = 7 * 86400   # expired coupons kept this long to answer "expired"
+
+
+# ===============================
+# COUPON INDEX
+# ===============================
+# code -> coupon metadata for every live coupon, with expiries in a heap so
+# expired coupons are dropped in order. Once loaded the index is the source
+# of truth for "does this code exist"; until then a bounded negative cache
+# remembers codes the database already said are invalid.
+class CouponIndex:
+    def __init__(self, negative_size=NEGATIVE_SIZE, negative_ttl=NEGATIVE_TTL):
+        self.loaded = False
+        self._coupons = {}
+        self._expiries = []   # (expires, code)
+        self._negative = OrderedDict()   # code -> remembered_at
+        self._added = {}                 # code -> (added_at, coupon), for load()
+        self.negative_size = negative_size
+        self.negative_ttl = negative_ttl
+        self.rejected = 0
+        self.passed = 0
+
+    def load(self, rows, started=None):
+        # `started`: time.monotonic() taken before the rows were fetched, so
+        # coupons created while the query was running aren't lost
+        coupons = {
+            row["code"]: {
+                "value": row["value"],
+                "expires": row["expires"],
+                "exhausted": row["used"] >= row["max_uses"]
+            }
+            for row in rows
+        }
+        if started is not None:
+            for code, (added_at, coupon) in self._added.items():
+                if added_at >= started:
+                    coupons[code] = coupon
+        self._added = {}
+
+        expiries = [(c["expires"], code) for code, c in coupons.items()]
+        heapq.heapify(expiries)
+
+        self._coupons, self._expiries = coupons, expiries
+        self._negative.clear()
+        self.loaded = True
+
+    def add(self, code, value, max_uses, expires):
+        coupon = {"value": value, "expires": expires, "exhausted": max_uses <= 0}
+        self._coupons[code] = coupon
+        self._added[code] = (time.monotonic(), coupon)
+        heapq.heappush(self._expiries, (expires, code))
+        self._negative.pop(code, None)
+
+    def _evict_expired(self, now):
+        while self._expiries and self._expiries[0][0] < now - EXPIRED_GRACE:
+            expires, code = heapq.heappop(self._expiries)
+            coupon = self._coupons.get(code)
+            # skip stale heap entries left by a re-created code
+            if coupon is not None and coupon["expires"] == expires:
+                del self._coupons[code]
+
+    # ---------- lookups ----------
+    def check(self, code, now=None):
+        # returns a rejection status, or None if the database must decide
+        now = int(time.time()) if now is None else now
+        status = self._check(code, now)
+        if status is None:
+            self.passed += 1
+        else:
+            self.rejected += 1
+        return status
+
+    def _check(self, code, now):
+        if not self.loaded:
+            remembered = self._negative.get(code)
+            if remembered is not None and time.monotonic() - remembered < self.negative_ttl:
+                return "invalid"
+            return None
+
+        self._evict_expired(now)
+        coupon = self._coupons.get(code)
+        if coupon is None:
+            return "invalid"
+        if coupon["expires"] < now:
+            return "expired"
+        if coupon["exhausted"]:
+            return "exhausted"
+        return None
+
+    # ---------- feedback from the database ----------
+    def observe(self, code, status):
+        if status == "invalid":
+            self._coupons.pop(code, None)
+            self._negative[code] = time.monotonic()
+            self._negative.move_to_end(code)
+            while len(self._negative) > self.negative_size:
+                self._negative.popitem(last=False)
+        elif status == "exhausted" and code in self._coupons:
+            self._coupons[code]["exhausted"] = True
+
+    def stats(self):
+        return {
+            "loaded": self.loaded,
+            "coupons": len(self._coupons),
+            "negative": len(self._negative),
+            "rejected": self.rejected,
+            "passed": self.passed
+        }
@@ -0,0 +1,50 @@
+import bisect
+
+GLOBAL = None   # legacy rows without a guild_id apply everywhere
+
+
+# ===============================
+# COMMAND INDEX
+# ===============================
+# guild_id -> {name: response} for O(1) lookups, plus a sorted name list per
+# guild so autocomplete is a bisect to the prefix and a short forward scan.
+class CommandIndex:
+    def __init__(self):
+        self._responses = {}
+        self._names = {}
+
+    def load(self, rows):
+        responses, names = {}, {}
+        for row in rows:
+            responses.setdefault(row.get("guild_id"), {})[row["name"]] = row["response"]
+        for guild_id, commands in responses.items():
+            names[guild_id] = sorted(commands)
+
+        # swap in one go so lookups never see a half-built index
+        self._responses, self._names = responses, names
+
+    def set(self, guild_id, name, response):
+        commands = self._responses.setdefault(guild_id, {})
+        if name not in commands:
+            bisect.insort(self._names.setdefault(guild_id, []), name)
+        commands[name] = response
+
+    def get(self, guild_id, name):
+        response = self._responses.get(guild_id, {}).get(name)
+        if response is None:
+            response = self._responses.get(GLOBAL, {}).get(name)
+        return response
+
+    def complete(self, guild_id, prefix, limit=25):
+        found = []
+        for scope in (guild_id, GLOBAL):
+            names = self._names.get(scope, [])
+            i = bisect.bisect_left(names, prefix)
+            while i < len(names) and names[i].startswith(prefix) and len(found) < limit:
+                if names[i] not in found:
+                    found.append(names[i])
+                i += 1
+        return sorted(found)
+
+    def __len__(self):
+        return sum(len(c) for c in self._responses.values())
@@ -1,29 +1,430 @@
-import aiosqlite
+from concurrent.futures import ThreadPoolExecutor
+import aiosqlite, asyncio, sqlite3
+
+from utils.backup import register_reopen_hook
 
 DB_NAME = "bot.db"
+BUSY_TIMEOUT = 30  # seconds to wait on a locked database
+
+# ===============================
+# CONFIG
+# ===============================
+CACHED_STATEMENTS = 256   # prepared statements kept per connection
+CACHE_SIZE_KB = 65536     # page cache per connection
+GROUP_MAX = 512           # writes folded into one commit at most
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",   # WAL + NORMAL: durable across app crashes, one fsync per checkpoint
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT * 1000}"
+)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS coins ("
+    "user_id INTEGER PRIMARY KEY, "
+    "balance INTEGER NOT NULL DEFAULT 0)",
+
+    "CREATE TABLE IF NOT EXISTS payments ("
+    "invoice_id TEXT PRIMARY KEY, "
+    "user_id INTEGER NOT NULL, "
+    "rupees INTEGER NOT NULL, "
+    "coins INTEGER NOT NULL, "
+    "timestamp INTEGER NOT NULL)",
+
+    "CREATE TABLE IF NOT EXISTS coupons ("
+    "code TEXT PRIMARY KEY, "
+    "value INTEGER NOT NULL, "
+    "max_uses INTEGER NOT NULL, "
+    "used INTEGER NOT NULL DEFAULT 0, "
+    "expires INTEGER NOT NULL)",
+
+    "CREATE TABLE IF NOT EXISTS coupon_redemptions ("
+    "code TEXT NOT NULL, "
+    "user_id INTEGER NOT NULL, "
+    "redeemed_at INTEGER NOT NULL, "
+    "PRIMARY KEY (code, user_id))"
+)
+
+# Local SQLite stand-in for the Supabase coin ledger (sql/coin_ledger.sql,
+# sql/coupons.sql).
+# Every mutation is one operation inside a group-commit batch, isolated by
+# its own SAVEPOINT, so concurrent callers can never lose an update and a
+# failing operation never takes its batch-mates down with it.
+
 
-async def add_coins(user_id: int, amount: int):
-    async with aiosqlite.connect(DB_NAME) as db:
-        await db.execute(
-            "INSERT INTO coins (user_id, balance) VALUES (?, ?) "
-            "ON CONFLICT(user_id) DO UPDATE SET balance = balance + ?",
-            (user_id, amount, amount)
+# ===============================
+# CONNECTION MANAGER
+# ===============================
+# One long-lived writer and one long-lived reader instead of a connect per
+# call. Writes are queued; the commit loop drains whatever has piled up and
+# runs it as a single transaction in one hop to the writer thread, so a
+# burst of N small writes costs one commit instead of N. Callers are only
+# resolved after COMMIT. WAL lets the reader see every committed write
+# without waiting on the writer.
+class _Rollback(Exception):
+    # raised by an operation to undo its own writes but still return `value`
+    def __init__(self, value):
+        self.value = value
+
+
+def _open_writer(path):
+    con = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=CACHED_STATEMENTS
+    )
+    for pragma in PRAGMAS:
+        con.execute(pragma)
+    for statement in SCHEMA:
+        con.execute(statement)
+    return con
+
+
+def _run_batch(con, ops):
+    results = []
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        for fn, args in ops:
+            con.execute("SAVEPOINT op")
+            try:
+                results.append((True, fn(con, *args)))
+            except _Rollback as r:
+                con.execute("ROLLBACK TO op")
+                results.append((True, r.value))
+            except Exception as e:
+                con.execute("ROLLBACK TO op")
+                results.append((False, e))
+            con.execute("RELEASE op")
+        con.execute("COMMIT")
+    except BaseException:
+        if con.in_transaction:
+            con.execute("ROLLBACK")
+        raise
+    return results
+
+
+class SQLiteManager:
+    def __init__(self, path):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._writer = None
+        self._reader = None
+        self._queue = asyncio.Queue()
+        self._task = None
+        self.loop = asyncio.get_running_loop()   # the loop that owns the queue and futures
+        self._ready = asyncio.Event()
+        self.commits = 0
+        self.writes = 0
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._writer = await loop.run_in_executor(self._executor, _open_writer, self.path)
+        self._reader = await aiosqlite.connect(
+            self.path, timeout=BUSY_TIMEOUT, cached_statements=CACHED_STATEMENTS
         )
-        await db.commit()
+        self._reader.row_factory = aiosqlite.Row
+        for pragma in PRAGMAS[1:]:
+            await self._reader.execute(pragma)
+        self._task = asyncio.create_task(self._commit_loop())
+        self._ready.set()
+
+    async def close(self):
+        # new calls wait on _ready; queued writes are committed first
+        self._ready.clear()
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+        if self._reader is not None:
+            await self._reader.close()
+            self._reader = None
+        if self._writer is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._writer.close)
+            self._writer = None
+        self._executor.shutdown(wait=True)
+
+    def abandon(self):
+        # close() for a manager whose loop is gone or not the running one:
+        # nothing can be awaited there, so stop both threads synchronously
+        if self._reader is not None:
+            self._reader.stop()
+            self._reader = None
+        if self._writer is not None:
+            self._executor.submit(self._writer.close).result()
+            self._writer = None
+        self._executor.shutdown(wait=True)
+
+    # ---------- writes ----------
+    async def write(self, fn, *args):
+        if not self._ready.is_set():
+            await self._ready.wait()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((fn, args, future))
+        return await future
+
+    async def _commit_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < GROUP_MAX and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            ops = [(fn, args) for fn, args, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, _run_batch, self._writer, ops)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                self.commits += 1
+                self.writes += len(batch)
+                for (_, _, future), (ok, value) in zip(batch, results):
+                    if future.done():
+                        continue
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+
+            if stop:
+                return
+
+    # ---------- reads ----------
+    async def fetchone(self, sql, params=()):
+        if not self._ready.is_set():
+            await self._ready.wait()
+        async with self._reader.execute(sql, params) as cur:
+            return await cur.fetchone()
+
+    async def fetchall(self, sql, params=()):
+        if not self._ready.is_set():
+            await self._ready.wait()
+        async with self._reader.execute(sql, params) as cur:
+            return await cur.fetchall()
+
+    def stats(self):
+        return {
+            "commits": self.commits,
+            "writes": self.writes,
+            "avg_batch": round(self.writes / self.commits, 1) if self.commits else 0.0,
+            "queued": self._queue.qsize()
+        }
+
+
+# ===============================
+# REGISTRY
+# ===============================
+_manager = None
+_open_lock = None
+_open_loop = None
+_resumed = None   # cleared while utils/backup.restore_db swaps bot.db
+
+
+async def get_manager():
+    global _manager, _open_lock, _open_loop
+    loop = asyncio.get_running_loop()
+    if _resumed is not None and not _resumed.is_set():
+        await _resumed.wait()
+    if _manager is not None and _manager.loop is loop:
+        return _manager
+
+    if _open_loop is not loop:
+        _open_lock, _open_loop = asyncio.Lock(), loop
+    async with _open_lock:
+        if _manager is not None and _manager.loop is not loop:
+            # e.g. a second asyncio.run(); the old loop can't close it
+            old, _manager = _manager, None
+            await asyncio.to_thread(old.abandon)
+        if _manager is None:
+            manager = SQLiteManager(DB_NAME)
+            await manager.open()
+            _manager = manager
+    return _manager
+
+
+async def close():
+    global _manager
+    if _manager is not None:
+        manager, _manager = _manager, None
+        await manager.close()
+
+
+async def pause():
+    # queued writes are committed, then new calls wait until resume()
+    global _resumed
+    _resumed = asyncio.Event()
+    await close()
+
 
-async def remove_coins(user_id: int, amount: int):
-    async with aiosqlite.connect(DB_NAME) as db:
-        await db.execute(
-            "UPDATE coins SET balance = balance - ? WHERE user_id=? AND balance >= ?",
+async def resume():
+    if _resumed is not None:
+        _resumed.set()
+
+
+register_reopen_hook(pause, resume)
+
+
+def stats():
+    return _manager.stats() if _manager is not None else None
+
+
+async def _write(fn, *args):
+    return await (await get_manager()).write(fn, *args)
+
+
+# ===============================
+# OPERATIONS
+# ===============================
+# Each runs on the writer thread inside the batch transaction.
+def _add_coins(con, user_id, amount):
+    return con.execute(
+        "INSERT INTO coins (user_id, balance) VALUES (?, ?) "
+        "ON CONFLICT(user_id) DO UPDATE SET balance = balance + ? "
+        "RETURNING balance",
+        (user_id, amount, amount)
+    ).fetchone()[0]
+
+
+def _remove_coins(con, user_id, amount, clamp):
+    if clamp:
+        row = con.execute(
+            "UPDATE coins SET balance = MAX(balance - ?, 0) WHERE user_id=? "
+            "RETURNING balance",
+            (amount, user_id)
+        ).fetchone()
+    else:
+        row = con.execute(
+            "UPDATE coins SET balance = balance - ? WHERE user_id=? AND balance >= ? "
+            "RETURNING balance",
             (amount, user_id, amount)
-        )
-        await db.commit()
+        ).fetchone()
+
+    if row:
+        return row[0]
+    return 0 if clamp else None
+
+
+def _transfer_coins(con, sender_id, receiver_id, amount):
+    sender = con.execute(
+        "UPDATE coins SET balance = balance - ? WHERE user_id=? AND balance >= ? "
+        "RETURNING balance",
+        (amount, sender_id, amount)
+    ).fetchone()
+    if not sender:
+        return None
+    return sender[0], _add_coins(con, receiver_id, amount)
+
+
+def _get_coins(con, user_id):
+    row = con.execute("SELECT balance FROM coins WHERE user_id=?", (user_id,)).fetchone()
+    return row[0] if row else 0
+
+
+def _credit_payment(con, invoice_id, user_id, rupees, coins, timestamp):
+    cur = con.execute(
+        "INSERT INTO payments (invoice_id, user_id, rupees, coins, timestamp) "
+        "VALUES (?, ?, ?, ?, ?) ON CONFLICT(invoice_id) DO NOTHING",
+        (invoice_id, user_id, rupees, coins, timestamp)
+    )
+    if cur.rowcount == 0:
+        return _get_coins(con, user_id), False
+    return _add_coins(con, user_id, coins), True
+
+
+def _create_coupon(con, code, value, max_uses, expires):
+    con.execute(
+        "INSERT INTO coupons (code, value, max_uses, used, expires) VALUES (?, ?, ?, 0, ?)",
+        (code, value, max_uses, expires)
+    )
+
+
+def _redeem_coupon(con, code, user_id, now):
+    cur = con.execute(
+        "INSERT INTO coupon_redemptions (code, user_id, redeemed_at) "
+        "VALUES (?, ?, ?) ON CONFLICT(code, user_id) DO NOTHING",
+        (code, user_id, now)
+    )
+    if cur.rowcount == 0:
+        return "already_redeemed", None, None
+
+    row = con.execute(
+        "UPDATE coupons SET used = used + 1 "
+        "WHERE code=? AND used < max_uses AND expires >= ? "
+        "RETURNING value",
+        (code, now)
+    ).fetchone()
+    if not row:
+        coupon = con.execute("SELECT expires FROM coupons WHERE code=?", (code,)).fetchone()
+        if not coupon:
+            status = "invalid"
+        else:
+            status = "expired" if coupon[0] < now else "exhausted"
+        # undo the redemption row, keep the answer
+        raise _Rollback((status, None, None))
+
+    value = row[0]
+    return "ok", value, _add_coins(con, user_id, value)
+
+
+# ===============================
+# PUBLIC API
+# ===============================
+async def init_tables():
+    # the schema is also ensured whenever the writer connection opens
+    await get_manager()
+
+async def add_coins(user_id: int, amount: int) -> int:
+    return await _write(_add_coins, user_id, amount)
+
+async def remove_coins(user_id: int, amount: int, clamp: bool = False):
+    # returns the new balance, or None when the user can't afford it
+    return await _write(_remove_coins, user_id, amount, clamp)
+
+async def transfer_coins(sender_id: int, receiver_id: int, amount: int):
+    # returns (sender_balance, receiver_balance), or None when the sender can't afford it
+    return await _write(_transfer_coins, sender_id, receiver_id, amount)
+
+async def credit_payment(invoice_id: str, user_id: int, rupees: int, coins: int, timestamp: int):
+    # returns (balance, credited); replaying an invoice id credits nothing
+    return await _write(_credit_payment, invoice_id, user_id, rupees, coins, timestamp)
+
+async def create_coupon(code: str, value: int, max_uses: int, expires: int):
+    await _write(_create_coupon, code, value, max_uses, expires)
+
+async def redeem_coupon(code: str, user_id: int, now: int):
+    # mirrors redeem_coupon() in sql/coupons.sql; returns (status, value, balance)
+    return await _write(_redeem_coupon, code, user_id, now)
+
+async def list_coupons(now: int):
+    rows = await (await get_manager()).fetchall(
+        "SELECT code, value, max_uses, used, expires FROM coupons WHERE expires >= ?",
+        (now,)
+    )
+    return [dict(row) for row in rows]
 
 async def get_coins(user_id: int) -> int:
-    async with aiosqlite.connect(DB_NAME) as db:
-        cur = await db.execute(
-            "SELECT balance FROM coins WHERE user_id=?",
-            (user_id,)
-        )
-        row = await cur.fetchone()
-        return row[0] if row else 0
+    row = await (await get_manager()).fetchone(
+        "SELECT balance FROM coins WHERE user_id=?",
+        (user_id,)
+    )
+    return row[0] if row else 0
+
+async def top_coins(limit: int = 10):
+    rows = await (await get_manager()).fetchall(
+        "SELECT user_id, balance FROM coins ORDER BY balance DESC LIMIT ?",
+        (limit,)
+    )
+    return [dict(row) for row in rows]
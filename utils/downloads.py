@@ -0,0 +1,75 @@
+from PIL import Image
+from io import BytesIO
+import aiohttp, asyncio
+
+CHUNK_SIZE = 64 * 1024
+MAX_PIXELS = 4096 * 4096   # checked before decoding; a few MB of PNG can expand to GBs
+TIMEOUT = aiohttp.ClientTimeout(total=20, sock_read=10)
+
+
+class DownloadError(Exception):
+    pass
+
+
+# ===============================
+# STREAMING FETCH
+# ===============================
+# Rejects on status / content-type before reading the body and aborts as soon
+# as more than `max_bytes` arrive, so a huge or slow URL never ends up in
+# memory or stalls the loop.
+async def fetch_limited(session, url, max_bytes, content_types=("image/",), timeout=TIMEOUT):
+    try:
+        async with session.get(url, timeout=timeout) as r:
+            if r.status != 200:
+                raise DownloadError(f"HTTP {r.status}")
+
+            content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if not content_type.startswith(content_types):
+                raise DownloadError(f"Unsupported content type `{content_type or 'unknown'}`")
+
+            if r.content_length is not None and r.content_length > max_bytes:
+                raise DownloadError(f"File is larger than {max_bytes // 1024} KB")
+
+            data = bytearray()
+            async for chunk in r.content.iter_chunked(CHUNK_SIZE):
+                data.extend(chunk)
+                if len(data) > max_bytes:
+                    raise DownloadError(f"File is larger than {max_bytes // 1024} KB")
+
+            return bytes(data), content_type
+    except aiohttp.InvalidURL:
+        raise DownloadError("Invalid URL")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise DownloadError(f"Download failed: {e.__class__.__name__}")
+
+
+# ===============================
+# DOWNSCALE
+# ===============================
+# CPU-bound: call through asyncio.to_thread
+def shrink_image(data, max_bytes, sizes=(128, 96, 64), max_pixels=MAX_PIXELS):
+    try:
+        with Image.open(BytesIO(data)) as img:
+            # Image.open only reads the header; refuse before anything is decoded
+            width, height = img.size
+            if width * height > max_pixels:
+                raise DownloadError(f"Image is too large ({width}x{height})")
+            if getattr(img, "is_animated", False):
+                raise DownloadError("Animated image is too large to shrink")
+            # JPEG: decode at a reduced scale straight away
+            img.draft("RGB", (max(sizes), max(sizes)))
+            img = img.convert("RGBA")
+    except Image.DecompressionBombError:
+        raise DownloadError("Image is too large")
+    except OSError:
+        raise DownloadError("Unsupported or corrupt image")
+
+    for size in sizes:
+        small = img.copy()
+        small.thumbnail((size, size), Image.LANCZOS)
+        buf = BytesIO()
+        small.save(buf, "PNG", optimize=True)
+        if buf.tell() <= max_bytes:
+            return buf.getvalue()
+
+    raise DownloadError(f"Could not shrink image below {max_bytes // 1024} KB")
@@ -0,0 +1,92 @@
+import asyncio, heapq, time
+
+# ===============================
+# CONFIG
+# ===============================
+HORIZON = 6 * 3600   # only expiries this far ahead are held in memory
+RETRY_DELAY = 60     # seconds before retrying a failed bulk delete
+
+
+# ===============================
+# EXPIRY SCHEDULER
+# ===============================
+# Min-heap of (expires, key) for everything due within HORIZON, seeded by a
+# range query and kept current through schedule(). The runner sleeps until
+# the earliest expiry (or the end of the horizon, to reseed) and hands every
+# key that is due to `expire` in one call, so cost tracks the number of
+# expiries rather than the number of rows.
+#
+#   load(until)       -> awaitable list of (key, expires) due by `until`
+#   expire(keys, now) -> awaitable bulk removal of those keys
+class ExpiryScheduler:
+    def __init__(self, load, expire, horizon=HORIZON):
+        self._load = load
+        self._expire = expire
+        self.horizon = horizon
+        self._heap = []
+        self._due = {}
+        self._horizon_end = 0
+        self._wake = asyncio.Event()
+        self.expired = 0
+
+    def schedule(self, key, expires):
+        if expires <= self._horizon_end:
+            self._due[key] = expires
+            heapq.heappush(self._heap, (expires, key))
+            self._wake.set()
+        else:
+            # renewed past the horizon: the old heap entry is now stale
+            self._due.pop(key, None)
+
+    def cancel(self, key):
+        self._due.pop(key, None)
+
+    async def seed(self, now):
+        until = now + self.horizon
+        rows = await self._load(until)
+
+        self._heap = [(expires, key) for key, expires in rows]
+        heapq.heapify(self._heap)
+        self._due = {key: expires for key, expires in rows}
+        self._horizon_end = until
+
+    def _pop_due(self, now):
+        keys = []
+        while self._heap and self._heap[0][0] <= now:
+            expires, key = heapq.heappop(self._heap)
+            if self._due.get(key) == expires:
+                del self._due[key]
+                keys.append(key)
+        return keys
+
+    async def run(self):
+        while True:
+            now = int(time.time())
+            if now >= self._horizon_end:
+                try:
+                    await self.seed(now)
+                except Exception as e:
+                    print("Expiry seed error:", e)
+                    await asyncio.sleep(RETRY_DELAY)
+                    continue
+
+            keys = self._pop_due(now)
+            if keys:
+                try:
+                    await self._expire(keys, now)
+                    self.expired += len(keys)
+                except Exception as e:
+                    print("Expiry error:", e)
+                    for key in keys:
+                        self.schedule(key, now + RETRY_DELAY)
+                continue
+
+            next_at = self._heap[0][0] if self._heap else self._horizon_end
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(),
+                    timeout=max(0, min(next_at, self._horizon_end) - time.time())
+                )
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,29 @@
+from utils import supabase_db as db
+from utils.cache import TTLCache
+
+# ===============================
+# CONFIG
+# ===============================
+SETTINGS_TTL = 300   # seconds a guild's settings row is served from memory
+
+_cache = TTLCache(ttl=SETTINGS_TTL)
+
+
+# ===============================
+# READ-THROUGH / WRITE-THROUGH
+# ===============================
+async def get_settings(guild_id):
+    return await _cache.get_or_load(guild_id, lambda: db.get_guild_settings(guild_id))
+
+
+async def update_settings(data):
+    await db.upsert_guild_settings(data)
+    _cache.invalidate(data["guild_id"])
+
+
+def invalidate(guild_id):
+    _cache.invalidate(guild_id)
+
+
+def stats():
+    return _cache.stats()
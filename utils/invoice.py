@@ -0,0 +1,71 @@
+from PIL import Image, ImageDraw, ImageFont
+from io import BytesIO
+import os, urllib.request
+
+# ===============================
+# CONFIG
+# ===============================
+BG_PATH = "assets/invoice_bg.png"
+BG_URL = "https://files.catbox.moe/yslxzu.png"
+BG_CACHE = os.path.join(".cache", "invoice_bg.png")
+FONT_PATH = "fonts/CinzelDecorative-Bold.ttf"
+
+SIZE = (900, 500)
+PNG_COMPRESS_LEVEL = 1   # ~3x faster encode than 6 for ~15% more bytes
+
+# per-process: built once, then every render is copy + draw + encode
+_template = None
+_fonts = None
+
+
+# ===============================
+# TEMPLATE
+# ===============================
+def _background_path():
+    if os.path.exists(BG_PATH):
+        return BG_PATH
+
+    if not os.path.exists(BG_CACHE):
+        os.makedirs(os.path.dirname(BG_CACHE), exist_ok=True)
+        tmp = BG_CACHE + ".part"
+        with urllib.request.urlopen(BG_URL, timeout=30) as r, open(tmp, "wb") as f:
+            f.write(r.read())
+        os.replace(tmp, BG_CACHE)
+    return BG_CACHE
+
+
+def load_template():
+    global _template, _fonts
+    if _template is not None:
+        return
+
+    with Image.open(_background_path()) as bg:
+        _template = bg.convert("RGB").resize(SIZE)
+
+    try:
+        _fonts = (ImageFont.truetype(FONT_PATH, 36), ImageFont.truetype(FONT_PATH, 24))
+    except OSError:
+        _fonts = (ImageFont.load_default(), ImageFont.load_default())
+
+
+# ===============================
+# RENDER
+# ===============================
+def render_invoice(username, rupees, coins, invoice_id, date, compress_level=PNG_COMPRESS_LEVEL):
+    load_template()
+    font_big, font_small = _fonts
+
+    img = _template.copy()
+    draw = ImageDraw.Draw(img)
+
+    draw.text((50, 50), "PSG FAMILY INVOICE", font=font_big, fill="white")
+    draw.text((50, 130), f"Customer: {username}", font=font_small, fill="white")
+    draw.text((50, 180), f"Paid Amount: ₹{rupees}", font=font_small, fill="white")
+    draw.text((50, 230), f"Coins Credited: {coins}", font=font_small, fill="white")
+    draw.text((50, 280), f"Invoice ID: {invoice_id}", font=font_small, fill="white")
+    draw.text((50, 330), f"Date: {date}", font=font_small, fill="white")
+    draw.text((700, 420), "PAID", font=font_big, fill="green")
+
+    buf = BytesIO()
+    img.save(buf, "PNG", compress_level=compress_level)
+    return buf.getvalue()
@@ -0,0 +1,89 @@
+from utils.cache import TTLCache
+import bisect
+
+# ===============================
+# CONFIG
+# ===============================
+CAPACITY = 100            # ranks kept per board (10 pages of 10)
+PAGE_SIZE = 10
+RECONCILE_SECONDS = 600   # boards are rebuilt from the DB this often
+MAX_BOARDS = 5_000
+
+
+# ===============================
+# TOP-K BOARD
+# ===============================
+# Sorted (-score, user_id) list plus the row for every ranked member.
+# `floor` bounds everyone who is *not* on the board: a member who drops
+# below it leaves, and an outsider only joins once they beat it, so the
+# board is always an exact prefix of the real ranking.
+class TopK:
+    def __init__(self, rows, score, capacity=CAPACITY):
+        self.score = score
+        self.capacity = capacity
+        rows = rows[:capacity]
+        self._rows = {row["user_id"]: row for row in rows}
+        self._order = sorted((-row[score], row["user_id"]) for row in rows)
+        self.floor = min(row[score] for row in rows) if len(rows) >= capacity else float("-inf")
+
+    def update(self, user_id, row):
+        old = self._rows.pop(user_id, None)
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, (-old[self.score], user_id))]
+
+        score = row[self.score]
+        if score <= self.floor:
+            return
+
+        bisect.insort(self._order, (-score, user_id))
+        self._rows[user_id] = row
+        if len(self._order) > self.capacity:
+            neg, evicted = self._order.pop()
+            del self._rows[evicted]
+            self.floor = max(self.floor, -neg)
+
+    def page(self, page, per_page=PAGE_SIZE):
+        start = (page - 1) * per_page
+        return [
+            (start + i, self._rows[user_id])
+            for i, (_, user_id) in enumerate(self._order[start:start + per_page], start=1)
+        ]
+
+    def pages(self, per_page=PAGE_SIZE):
+        return max(1, -(-len(self._order) // per_page))
+
+    def __len__(self):
+        return len(self._order)
+
+
+# ===============================
+# LEADERBOARD
+# ===============================
+# One TopK per scope (guild id, or None for global boards). Boards are
+# loaded on first read, kept current by update() on every write, and
+# dropped after RECONCILE_SECONDS so the next read rebuilds from the DB.
+class Leaderboard:
+    def __init__(self, load, score, capacity=CAPACITY, ttl=RECONCILE_SECONDS):
+        self._load = load   # async (scope, limit) -> rows ordered by score desc
+        self.score = score
+        self.capacity = capacity
+        self._boards = TTLCache(ttl=ttl, max_size=MAX_BOARDS)
+
+    async def board(self, scope=None):
+        return await self._boards.get_or_load(scope, lambda: self._build(scope))
+
+    async def _build(self, scope):
+        return TopK(await self._load(scope, self.capacity), self.score, self.capacity)
+
+    def update(self, scope, user_id, row):
+        # only boards already in memory; a cold board is built fresh on read
+        board = self._boards.get(scope)
+        if board is not None:
+            board.update(user_id, row)
+
+    async def page(self, scope, page, per_page=PAGE_SIZE):
+        board = await self.board(scope)
+        return board.page(page, per_page), board.pages(per_page)
+
+    def invalidate(self, scope=None):
+        self._boards.invalidate(scope)
@@ -0,0 +1,35 @@
+from concurrent.futures import ProcessPoolExecutor
+import asyncio, os
+
+# Pillow work (draw + PNG encode) holds the GIL for most of its runtime, so
+# it goes to worker processes instead of blocking the event loop.
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+
+_pool = None
+
+
+def _init_worker():
+    # build templates once per worker instead of on the first request
+    from utils.invoice import load_template
+    from utils.cards import load_fonts
+    load_template()
+    load_fonts()
+
+
+def get_render_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, initializer=_init_worker)
+    return _pool
+
+
+async def run_render(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_render_pool(), fn, *args)
+
+
+def shutdown_render_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
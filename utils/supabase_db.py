@@ -1,57 +1,274 @@
-from supabase import create_client
-import os, time
+from utils.supabase_pool import init_pool, get_pool
+import time
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+async def init_db(pool_size=None, client=None):
+    pool = init_pool(pool_size, client)
+    print(f"✅ Supabase connected (pool size {pool.size})")
+    return pool
+
+
+# ===== CORE =====
+# supabase-py is synchronous: every .execute() runs on the shared pool's
+# bounded executor so a slow round-trip never blocks the event loop
+def table(name):
+    return get_pool().table(name)
+
+
+async def execute(query):
+    return await get_pool().execute(query)
+
+
+async def rpc(fn, params):
+    res = await execute(get_pool().rpc(fn, params))
+    return res.data
+
+
+async def fetch_one(query):
+    res = await execute(query)
+    return res.data[0] if res.data else None
+
+
+async def fetch_all(query):
+    res = await execute(query)
+    return res.data or []
+
+
+async def fetch_paged(build, page_size=1000):
+    # PostgREST caps rows per response; `build` returns a fresh ordered query
+    rows, offset = [], 0
+    while True:
+        page = await fetch_all(build().range(offset, offset + page_size - 1))
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        offset += page_size
 
-async def init_db():
-    print("✅ Supabase connected")
 
 # ===== COINS =====
 async def get_coins(user_id):
-    res = supabase.table("coins").select("*").eq("user_id", user_id).execute()
-    return res.data[0]["balance"] if res.data else 0
+    row = await fetch_one(table("coins").select("balance").eq("user_id", user_id))
+    return row["balance"] if row else 0
 
 async def set_coins(user_id, balance):
-    supabase.table("coins").upsert({
+    await execute(table("coins").upsert({
         "user_id": user_id,
         "balance": balance
-    }).execute()
+    }))
+
+async def top_coins(limit=10):
+    return await fetch_all(
+        table("coins").select("*").order("balance", desc=True).limit(limit)
+    )
+
+# ===== LEVELS =====
+async def get_level(guild_id, user_id):
+    return await fetch_one(
+        table("levels").select("*").eq("user_id", user_id).eq("guild_id", guild_id)
+    )
+
+async def insert_level(guild_id, user_id, xp, level):
+    await execute(table("levels").insert({
+        "user_id": user_id,
+        "guild_id": guild_id,
+        "xp": xp,
+        "level": level
+    }))
+
+async def update_level(guild_id, user_id, xp, level):
+    await execute(table("levels").update({
+        "xp": xp,
+        "level": level
+    }).eq("user_id", user_id).eq("guild_id", guild_id))
+
+async def upsert_levels(rows):
+    await execute(table("levels").upsert(rows, on_conflict="guild_id,user_id"))
+
+async def top_levels(guild_id, limit=10):
+    return await fetch_all(
+        table("levels").select("*").eq("guild_id", guild_id)
+        .order("xp", desc=True).limit(limit)
+    )
 
 # ===== PREMIUM =====
 async def set_premium(user_id, tier, days):
-    supabase.table("premium").upsert({
+    await set_premium_until(user_id, tier, int(time.time()) + days * 86400)
+
+async def set_premium_until(user_id, tier, expires):
+    await execute(table("premium").upsert({
         "user_id": user_id,
         "tier": tier,
-        "expires": int(time.time()) + days * 86400
-    }).execute()
+        "expires": expires
+    }))
 
 async def get_premium(user_id):
-    res = supabase.table("premium").select("*").eq("user_id", user_id).execute()
-    return res.data[0] if res.data else None
+    return await fetch_one(table("premium").select("*").eq("user_id", user_id))
+
+async def list_premium_expiring(until):
+    return await fetch_paged(
+        lambda: table("premium").select("user_id, expires").lte("expires", until)
+        .order("expires").order("user_id")
+    )
+
+async def delete_expired_premium(user_ids, now, batch_size=200):
+    # the expires guard keeps members who renewed in the meantime
+    for i in range(0, len(user_ids), batch_size):
+        await execute(
+            table("premium").delete()
+            .in_("user_id", user_ids[i:i + batch_size]).lte("expires", now)
+        )
 
 # ===== WELCOME =====
 async def set_welcome(guild_id, channel, role, message, thumb):
-    supabase.table("welcome_config").upsert({
+    await execute(table("welcome_config").upsert({
         "guild_id": guild_id,
         "welcome_channel": channel,
         "welcome_role": role,
         "welcome_message": message,
         "thumbnail_url": thumb
-    }).execute()
+    }))
 
 async def get_welcome(guild_id):
-    res = supabase.table("welcome_config").select("*").eq("guild_id", guild_id).execute()
-    return res.data[0] if res.data else None
+    return await fetch_one(table("welcome_config").select("*").eq("guild_id", guild_id))
+
+# ===== GUILD SETTINGS =====
+async def get_guild_settings(guild_id, columns="*"):
+    return await fetch_one(
+        table("guild_settings").select(columns).eq("guild_id", guild_id)
+    )
+
+async def upsert_guild_settings(data):
+    await execute(table("guild_settings").upsert(data))
 
 # ===== TICKETS =====
 async def create_ticket(channel_id, user_id, category):
-    supabase.table("tickets").insert({
+    await execute(table("tickets").insert({
         "channel_id": channel_id,
         "user_id": user_id,
         "claimed_by": None,
         "category": category,
         "created_at": int(time.time())
-    }).execute()
+    }))
+
+async def claim_ticket(channel_id, staff_id):
+    await execute(table("tickets").update({
+        "claimed_by": staff_id
+    }).eq("channel_id", channel_id))
+
+# ===== WARNINGS =====
+async def get_warnings(guild_id, user_id):
+    return await fetch_one(
+        table("warnings").select("*").eq("user_id", user_id).eq("guild_id", guild_id)
+    )
+
+async def insert_warnings(guild_id, user_id, count):
+    await execute(table("warnings").insert({
+        "user_id": user_id,
+        "guild_id": guild_id,
+        "count": count
+    }))
+
+async def update_warnings(guild_id, user_id, count):
+    await execute(table("warnings").update({
+        "count": count
+    }).eq("user_id", user_id).eq("guild_id", guild_id))
+
+# ===== YOUTUBE ALERTS =====
+async def add_youtube_alert(guild_id, youtube_channel, discord_channel, role_ping):
+    await execute(table("youtube_alerts").insert({
+        "guild_id": guild_id,
+        "youtube_channel": youtube_channel,
+        "discord_channel": discord_channel,
+        "role_ping": role_ping,
+        "last_video": ""
+    }))
+
+async def list_youtube_alerts(guild_id=None):
+    if guild_id is not None:
+        return await fetch_all(table("youtube_alerts").select("*").eq("guild_id", guild_id))
+    return await fetch_paged(
+        lambda: table("youtube_alerts").select("*")
+        .order("youtube_channel").order("guild_id").order("discord_channel")
+    )
+
+async def set_last_video(youtube_channel, video_id):
+    await execute(table("youtube_alerts").update({
+        "last_video": video_id
+    }).eq("youtube_channel", youtube_channel))
+
+# ===== CUSTOM COMMANDS =====
+async def set_custom_command(guild_id, name, response):
+    await execute(table("custom_commands").upsert({
+        "guild_id": guild_id,
+        "name": name,
+        "response": response
+    }, on_conflict="guild_id,name"))
+
+async def list_custom_commands():
+    return await fetch_paged(
+        lambda: table("custom_commands").select("guild_id, name, response").order("name")
+    )
+
+# ===== COUPONS =====
+async def create_coupon(code, value, max_uses, expires):
+    await execute(table("coupons").insert({
+        "code": code,
+        "value": value,
+        "max_uses": max_uses,
+        "used": 0,
+        "expires": expires
+    }))
+
+async def get_coupon(code):
+    return await fetch_one(table("coupons").select("*").eq("code", code))
+
+async def list_coupons(now):
+    # live coupons only; expired ones can never be redeemed again
+    return await fetch_paged(
+        lambda: table("coupons").select("code,value,max_uses,used,expires")
+        .gte("expires", now).order("code")
+    )
+
+# ===== ANNOUNCEMENTS =====
+async def add_announcement(data):
+    await execute(table("announcements").insert(data))
+
+async def list_announcements(guild_id, limit=10):
+    return await fetch_all(
+        table("announcements").select("*").eq("guild_id", guild_id)
+        .order("timestamp", desc=True).limit(limit)
+    )
+
+async def delete_announcement(announce_id):
+    await execute(table("announcements").delete().eq("id", announce_id))
+
+# ===== PAYMENTS =====
+async def save_payment(invoice_id, user_id, rupees, coins, timestamp):
+    await execute(table("payments").insert({
+        "invoice_id": invoice_id,
+        "user_id": user_id,
+        "rupees": rupees,
+        "coins": coins,
+        "timestamp": timestamp
+    }))
+
+# ===== THEMES =====
+async def set_user_theme(user_id, theme):
+    await execute(table("user_themes").upsert({
+        "user_id": user_id,
+        "theme": theme
+    }))
+
+async def get_user_theme(user_id):
+    row = await fetch_one(table("user_themes").select("theme").eq("user_id", user_id))
+    return row["theme"] if row else None
+
+async def get_user_themes(user_ids, batch_size=200):
+    themes = {}
+    for i in range(0, len(user_ids), batch_size):
+        rows = await fetch_all(
+            table("user_themes").select("user_id,theme")
+            .in_("user_id", user_ids[i:i + batch_size])
+        )
+        themes.update({row["user_id"]: row["theme"] for row in rows})
+    return themes
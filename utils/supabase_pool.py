@@ -0,0 +1,96 @@
+from supabase import create_client
+from concurrent.futures import ThreadPoolExecutor
+import asyncio, os, time
+
+# one supabase client (one HTTP session, one TLS handshake) for the whole
+# process; concurrency is capped at `size` so httpx keeps at most that many
+# keep-alive connections open
+DEFAULT_POOL_SIZE = 8
+
+
+class SupabasePool:
+    def __init__(self, client, size=DEFAULT_POOL_SIZE):
+        self.client = client
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="supabase")
+        self._slots = asyncio.Semaphore(size)
+
+        self.in_use = 0
+        self.waiting = 0
+        self.requests = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def table(self, name):
+        return self.client.table(name)
+
+    def rpc(self, fn, params):
+        return self.client.rpc(fn, params)
+
+    async def run(self, fn, *args):
+        if self._slots.locked():
+            self.waits += 1
+            self.waiting += 1
+            start = time.perf_counter()
+            try:
+                await self._slots.acquire()
+            finally:
+                self.waiting -= 1
+            self.wait_time += time.perf_counter() - start
+        else:
+            await self._slots.acquire()
+
+        self.in_use += 1
+        self.requests += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_use -= 1
+            self._slots.release()
+
+    async def execute(self, query):
+        return await self.run(query.execute)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "idle": self.size - self.in_use,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "waits": self.waits,
+            "avg_wait_ms": round(self.wait_time * 1000 / self.waits, 2) if self.waits else 0.0
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+# ===== REGISTRY =====
+_pool = None
+
+
+def init_pool(size=None, client=None):
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    if size is None:
+        size = int(os.getenv("SUPABASE_POOL_SIZE", DEFAULT_POOL_SIZE))
+    if client is None:
+        client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+    _pool = SupabasePool(client, size)
+    return _pool
+
+
+def get_pool():
+    return _pool if _pool is not None else init_pool()
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
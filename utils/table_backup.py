@@ -0,0 +1,425 @@
+from utils import supabase_db as db
+from datetime import datetime, timedelta, timezone
+import asyncio, gzip, hashlib, itertools, json, os, time, zlib
+
+# ===============================
+# CONFIG
+# ===============================
+# table -> unique key used for keyset pagination
+TABLE_KEYS = {
+    "coins": "user_id",
+    "premium": "user_id",
+    "welcome_config": "guild_id",
+    "tickets": "channel_id",
+    "payments": "invoice_id",
+    "coupons": "code",
+    "announcements": "id"
+}
+
+PAGE_SIZE = 1000
+RESTORE_CHUNK = 500
+RESTORE_WORKERS = 4
+COMPRESS_LEVEL = 6
+WATERMARK_SKEW = timedelta(minutes=1)   # overlap so clock skew can't drop rows
+BACKUP_SUFFIX = ".ndjson.gz"
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+# ===============================
+# READ: KEYSET PAGINATION
+# ===============================
+# `key > last` instead of OFFSET, so every page is an index range scan and
+# memory never holds more than one page per table.
+async def iter_table(table, key, since=None, page_size=PAGE_SIZE):
+    last = None
+    while True:
+        query = db.table(table).select("*").order(key).limit(page_size)
+        if last is not None:
+            query = query.gt(key, last)
+        if since is not None:
+            query = query.gt("updated_at", since)
+
+        rows = await db.fetch_all(query)
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1][key]
+
+
+# ===============================
+# CHECKSUMS
+# ===============================
+# Sum of per-row hashes mod 2^64: independent of row order, so a backup
+# written in key order can be checked against a restore done in parallel.
+# updated_at is skipped because the trigger rewrites it on insert.
+CHECKSUM_MOD = 1 << 64
+CHECKSUM_SKIP = ("updated_at",)
+
+
+def row_checksum(row):
+    data = {k: v for k, v in row.items() if k not in CHECKSUM_SKIP}
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return int.from_bytes(hashlib.sha256(encoded).digest()[:8], "big")
+
+
+class TableSums:
+    def __init__(self):
+        self.counts = {}
+        self.checksums = {}
+
+    def add(self, table, rows):
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+        total = self.checksums.get(table, 0)
+        for row in rows:
+            total += row_checksum(row)
+        self.checksums[table] = total % CHECKSUM_MOD
+
+
+# ===============================
+# WRITE: GZIP NDJSON
+# ===============================
+# One line per row: {"table": ..., "row": {...}}. All file work (encode,
+# compress, write) happens in worker threads; the file only appears under
+# its final name once complete.
+class NDJSONWriter:
+    def __init__(self, path):
+        self.path = path
+        self._tmp = path + ".part"
+        self._file = None
+        self.sums = TableSums()
+
+    def open(self):
+        self._file = gzip.open(self._tmp, "wt", encoding="utf-8", compresslevel=COMPRESS_LEVEL)
+
+    def write_rows(self, table, rows):
+        self._file.write("".join(
+            json.dumps({"table": table, "row": row}, separators=(",", ":"), default=str) + "\n"
+            for row in rows
+        ))
+        self.sums.add(table, rows)
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+
+def iter_backup(path):
+    # (table, row) per line; lazily decompressed, so constant memory
+    if not path.endswith(BACKUP_SUFFIX):
+        yield from _iter_legacy(path)
+        return
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            item = json.loads(line)
+            yield item["table"], item["row"]
+
+
+def _iter_legacy(path):
+    # pre-NDJSON backups: one pretty-printed {"table": [rows]} document
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for table in TABLE_KEYS:
+        for row in data.get(table) or []:
+            yield table, row
+
+
+def manifest_path(path):
+    return path[:-len(BACKUP_SUFFIX)] + MANIFEST_SUFFIX
+
+
+def read_manifest(path):
+    if not path.endswith(BACKUP_SUFFIX):
+        return None
+    try:
+        with open(manifest_path(path), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_json(path, data):
+    tmp = path + ".part"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+# ===============================
+# WATERMARK
+# ===============================
+def load_watermark(backup_dir):
+    try:
+        with open(os.path.join(backup_dir, "watermark.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_watermark(backup_dir, manifest):
+    previous = load_watermark(backup_dir) or {}
+    _write_json(os.path.join(backup_dir, "watermark.json"), {
+        "watermark": manifest["watermark"],
+        "last_full": manifest["created"] if manifest["kind"] == "full" else previous.get("last_full")
+    })
+
+
+# ===============================
+# BACKUP
+# ===============================
+async def create_backup(backup_dir, since=None):
+    # since=None: full backup; otherwise only rows with updated_at > since
+    started = datetime.now(timezone.utc)
+    kind = "full" if since is None else "incremental"
+    path = os.path.join(backup_dir, f"backup_{int(time.time())}_{kind}{BACKUP_SUFFIX}")
+
+    writer = NDJSONWriter(path)
+    counts, pending = {}, None
+    await asyncio.to_thread(writer.open)
+    try:
+        for table, key in TABLE_KEYS.items():
+            count = 0
+            async for rows in iter_table(table, key, since):
+                # fetch the next page while the previous one is compressed
+                if pending is not None:
+                    await pending
+                pending = asyncio.ensure_future(asyncio.to_thread(writer.write_rows, table, rows))
+                count += len(rows)
+            counts[table] = count
+
+        if pending is not None:
+            await pending
+        await asyncio.to_thread(writer.close)
+    except BaseException:
+        if pending is not None:
+            await asyncio.gather(pending, return_exceptions=True)
+        await asyncio.to_thread(writer.abort)
+        raise
+
+    manifest = {
+        "file": os.path.basename(path),
+        "kind": kind,
+        "created": int(started.timestamp()),
+        "since": since,
+        "watermark": (started - WATERMARK_SKEW).isoformat(),
+        "tables": counts,
+        "checksums": {table: writer.sums.checksums.get(table, 0) for table in counts}
+    }
+    await asyncio.to_thread(_write_json, manifest_path(path), manifest)
+    await asyncio.to_thread(save_watermark, backup_dir, manifest)
+    return path, manifest
+
+
+# ===============================
+# SNAPSHOT INTO A CHUNK STORE
+# ===============================
+# Same keyset read as create_backup(), but rows go into content-defined
+# chunks in utils.chunk_store, so only chunks that changed since any
+# earlier snapshot take disk space.
+def _chunk_rows(chunker, sums, table, rows):
+    chunker.add(rows)
+    sums.add(table, rows)
+
+
+async def create_snapshot(store):
+    started = int(time.time())
+    sums, chunks = TableSums(), {}
+    size = stored = 0
+
+    for table, key in TABLE_KEYS.items():
+        chunker, pending = store.row_writer(), None
+        async for rows in iter_table(table, key):
+            if pending is not None:
+                await pending
+            pending = asyncio.ensure_future(asyncio.to_thread(_chunk_rows, chunker, sums, table, rows))
+        if pending is not None:
+            await pending
+        chunks[table] = await asyncio.to_thread(chunker.finish)
+        size += chunker.size
+        stored += chunker.stored
+
+    manifest = {
+        "created": started,
+        "kind": "full",
+        "type": "tables",
+        "tables": {table: sums.counts.get(table, 0) for table in TABLE_KEYS},
+        "checksums": {table: sums.checksums.get(table, 0) for table in TABLE_KEYS},
+        "chunks": chunks,
+        "size": size,
+        "stored": stored
+    }
+    snapshot_id = await asyncio.to_thread(store.save_snapshot, manifest)
+    return snapshot_id, manifest
+
+
+# ===============================
+# RESTORE SOURCES
+# ===============================
+# restore_backup() reads from either a single backup file or a chunk-store
+# snapshot; both expose `manifest` (or None) and a (table, row) iterator.
+class FileSource:
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        self.path = path
+        self.manifest = read_manifest(path)
+
+    def rows(self):
+        return iter_backup(self.path)
+
+
+class SnapshotSource:
+    def __init__(self, store, snapshot_id):
+        self.name = snapshot_id
+        self.store = store
+        self.manifest = store.load_snapshot(snapshot_id)
+
+    def rows(self):
+        for table, digests in self.manifest["chunks"].items():
+            for row in self.store.iter_rows(digests):
+                yield table, row
+
+
+# ===============================
+# RESTORE
+# ===============================
+class BackupCorrupt(Exception):
+    pass
+
+
+def verify_source(source):
+    # one full read before anything is written: a truncated gzip, a missing
+    # or corrupt chunk (ChunkStore.get checks sha256) or a count/checksum
+    # mismatch raises here, while the tables are still untouched
+    sums = TableSums()
+    try:
+        for table, group in itertools.groupby(source.rows(), key=lambda item: item[0]):
+            sums.add(table, [row for _, row in group])
+    except (OSError, EOFError, zlib.error, ValueError, KeyError) as e:
+        raise BackupCorrupt(f"Backup `{source.name}` is unreadable: {e}")
+
+    manifest = source.manifest
+    if manifest is None:
+        return
+    for table, expected in manifest["tables"].items():
+        if sums.counts.get(table, 0) != expected:
+            raise BackupCorrupt(
+                f"Backup `{source.name}`: {table} has {sums.counts.get(table, 0)} rows, "
+                f"manifest says {expected}"
+            )
+        if "checksums" in manifest and sums.checksums.get(table, 0) != manifest["checksums"].get(table, 0):
+            raise BackupCorrupt(f"Backup `{source.name}`: {table} checksum mismatch")
+
+
+# A reader thread decompresses the file in bounded chunks onto a small
+# queue; RESTORE_WORKERS tasks upsert chunks concurrently. Memory is capped
+# at roughly (workers * 2 + 1) chunks whatever the backup size.
+async def _wipe(table):
+    key = TABLE_KEYS[table]
+    # PostgREST refuses an unfiltered delete; every row has a non-null key
+    await db.execute(db.table(table).delete().not_.is_(key, "null"))
+
+
+async def _table_sums(table):
+    sums = TableSums()
+    async for rows in iter_table(table, TABLE_KEYS[table]):
+        await asyncio.to_thread(sums.add, table, rows)
+    return sums.counts.get(table, 0), sums.checksums.get(table, 0)
+
+
+async def restore_backup(source, dry_run=False, progress=None,
+                         workers=RESTORE_WORKERS, chunk_size=RESTORE_CHUNK):
+    # source: FileSource or SnapshotSource
+    # progress: optional async callback(restored_rows, expected_rows or None)
+    # returns table -> {"expected", "restored", "checksum_ok", "db_ok"}
+    manifest = source.manifest
+    full = manifest is None or manifest["kind"] == "full"
+    expected_total = sum(manifest["tables"].values()) if manifest else None
+
+    if not dry_run:
+        await asyncio.to_thread(verify_source, source)
+
+    if full and not dry_run:
+        # delete by each table's own key, not a shared "id" column
+        for table in TABLE_KEYS:
+            await _wipe(table)
+
+    rows = source.rows()
+    file_sums = TableSums()
+
+    def read_chunk():
+        chunk = list(itertools.islice(rows, chunk_size))
+        for table, group in itertools.groupby(chunk, key=lambda item: item[0]):
+            file_sums.add(table, [row for _, row in group])
+        return chunk
+
+    queue = asyncio.Queue(maxsize=workers * 2)
+    restored = 0
+
+    async def reader():
+        while True:
+            chunk = await asyncio.to_thread(read_chunk)
+            if not chunk:
+                break
+            for table, group in itertools.groupby(chunk, key=lambda item: item[0]):
+                await queue.put((table, [row for _, row in group]))
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def worker():
+        nonlocal restored
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            table, batch = item
+            if not dry_run:
+                # upsert: replaying a chunk (or an incremental) is harmless
+                await db.execute(db.table(table).upsert(batch, on_conflict=TABLE_KEYS[table]))
+            restored += len(batch)
+            if progress is not None:
+                await progress(restored, expected_total)
+
+    tasks = [asyncio.ensure_future(reader())] + [
+        asyncio.ensure_future(worker()) for _ in range(workers)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    # ---------- verify ----------
+    report = {}
+    for table in TABLE_KEYS:
+        count = file_sums.counts.get(table, 0)
+        checksum = file_sums.checksums.get(table, 0)
+        entry = {"expected": count, "restored": count, "checksum_ok": None, "db_ok": None}
+
+        if manifest:
+            entry["expected"] = manifest["tables"].get(table, 0)
+            if "checksums" in manifest:
+                entry["checksum_ok"] = checksum == manifest["checksums"].get(table, 0)
+
+        if full and not dry_run:
+            entry["db_ok"] = await _table_sums(table) == (count, checksum)
+
+        report[table] = entry
+    return report
+
+
+def report_ok(report):
+    return all(
+        entry["restored"] == entry["expected"]
+        and entry["checksum_ok"] is not False
+        and entry["db_ok"] is not False
+        for entry in report.values()
+    )
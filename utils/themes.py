@@ -0,0 +1,103 @@
+import discord, json, os
+
+# ===============================
+# CONFIG
+# ===============================
+FONT_PATH = "fonts/CinzelDecorative-Bold.ttf"
+CUSTOM_THEMES_PATH = os.getenv("CUSTOM_THEMES_PATH", "themes.json")
+DEFAULT = "default"
+
+# A theme is plain data so it can be handed to render workers as-is:
+#   colors: RGB tuples for card backgrounds and text
+#   fonts:  role -> (font file, size)
+#   embed:  embed colour for text replies
+DEFAULT_FONTS = {
+    "title": (FONT_PATH, 40),
+    "body": (FONT_PATH, 28),
+    "small": (FONT_PATH, 22)
+}
+
+THEMES = {
+    "default": {
+        "colors": {"bg": (35, 39, 42), "panel": (47, 49, 54), "accent": (88, 101, 242), "text": (255, 255, 255), "muted": (185, 187, 190)},
+        "fonts": DEFAULT_FONTS,
+        "embed": 0x5865F2
+    },
+    "neon": {
+        "colors": {"bg": (10, 10, 25), "panel": (25, 20, 45), "accent": (57, 255, 20), "text": (240, 240, 255), "muted": (255, 0, 200)},
+        "fonts": DEFAULT_FONTS,
+        "embed": 0x39FF14
+    },
+    "dark": {
+        "colors": {"bg": (0, 0, 0), "panel": (24, 24, 24), "accent": (120, 120, 120), "text": (230, 230, 230), "muted": (140, 140, 140)},
+        "fonts": DEFAULT_FONTS,
+        "embed": 0x2B2D31
+    },
+    "gold": {
+        "colors": {"bg": (30, 22, 10), "panel": (50, 38, 18), "accent": (212, 175, 55), "text": (255, 245, 210), "muted": (200, 170, 100)},
+        "fonts": DEFAULT_FONTS,
+        "embed": 0xD4AF37
+    }
+}
+
+
+# ===============================
+# CUSTOM THEMES
+# ===============================
+def _rgb(value):
+    if isinstance(value, str):
+        value = value.lstrip("#")
+        return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+    return tuple(value)
+
+
+def register_theme(name, colors=None, font=None, embed=None, base=DEFAULT):
+    # unspecified parts are inherited from `base`
+    parent = THEMES[base]
+    theme = {
+        "colors": {**parent["colors"], **{k: _rgb(v) for k, v in (colors or {}).items()}},
+        "fonts": {role: (font, size) for role, (_, size) in parent["fonts"].items()} if font else parent["fonts"],
+        "embed": int(embed.lstrip("#"), 16) if isinstance(embed, str) else (embed or parent["embed"])
+    }
+    THEMES[name] = theme
+    return theme
+
+
+def load_custom_themes(path=CUSTOM_THEMES_PATH):
+    # {"ocean": {"colors": {"accent": "#1e90ff"}, "font": "fonts/x.ttf", "embed": "#1e90ff"}}
+    if not os.path.exists(path):
+        return 0
+
+    with open(path, encoding="utf-8") as f:
+        custom = json.load(f)
+
+    for name, spec in custom.items():
+        register_theme(
+            name.lower(),
+            colors=spec.get("colors"),
+            font=spec.get("font"),
+            embed=spec.get("embed"),
+            base=spec.get("base", DEFAULT)
+        )
+    return len(custom)
+
+
+# ===============================
+# LOOKUP
+# ===============================
+def get_theme(name):
+    return THEMES.get(name) or THEMES[DEFAULT]
+
+
+def theme_names():
+    return list(THEMES)
+
+
+def embed_color(name):
+    return discord.Color(get_theme(name)["embed"])
+
+
+try:
+    load_custom_themes()
+except (OSError, ValueError, KeyError) as e:
+    print("Custom themes load error:", e)
@@ -0,0 +1,46 @@
+from utils import supabase_db as db
+from utils.cache import TTLCache
+from utils.themes import THEMES, DEFAULT
+
+# ===============================
+# CONFIG
+# ===============================
+THEME_TTL = 600   # seconds a user's theme is served from memory
+
+_cache = TTLCache(ttl=THEME_TTL, max_size=50_000)
+_MISSING = object()
+
+
+def _resolve(theme):
+    # a removed custom theme falls back instead of breaking renders
+    return theme if theme in THEMES else DEFAULT
+
+
+# ===============================
+# READ-THROUGH / WRITE-THROUGH
+# ===============================
+async def get_theme(user_id):
+    theme = await _cache.get_or_load(user_id, lambda: db.get_user_theme(user_id))
+    return _resolve(theme)
+
+
+async def get_themes(user_ids):
+    # whole leaderboard pages: one query for every member not cached yet
+    missing = [uid for uid in set(user_ids) if _cache.get(uid, _MISSING) is _MISSING]
+    if missing:
+        found = await db.get_user_themes(missing)
+        for uid in missing:
+            # a set_theme() that landed meanwhile wins over this read
+            if _cache.get(uid, _MISSING) is _MISSING:
+                _cache.set(uid, found.get(uid))
+    return {uid: _resolve(_cache.get(uid)) for uid in user_ids}
+
+
+async def set_theme(user_id, theme):
+    await db.set_user_theme(user_id, theme)
+    _cache.invalidate(user_id)   # drops any in-flight read of the old theme
+    _cache.set(user_id, theme)
+
+
+def stats():
+    return _cache.stats()
@@ -0,0 +1,263 @@
+from collections import defaultdict, deque
+import discord, asyncio, time
+
+# ===============================
+# CONFIG
+# ===============================
+WORKERS = 4
+QUEUE_SIZE = 5000       # joins beyond this are dropped (and counted)
+BURST_THRESHOLD = 3     # more joins than this per channel per window -> batch
+BURST_WINDOW = 1.0      # seconds
+BATCH_MAX = 20          # members per batched welcome message
+
+# client-side budget per route, (requests, seconds); keeps raids under
+# Discord's buckets instead of leaning on 429 retries
+ROUTE_LIMITS = {
+    "roles": (10, 10),     # per guild
+    "dm": (5, 5),          # global
+    "channel": (5, 5)      # per channel
+}
+
+
+# ===============================
+# RATE LIMITER
+# ===============================
+class TokenBucket:
+    def __init__(self, rate, per):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+
+
+class RouteLimiter:
+    def __init__(self, limits=ROUTE_LIMITS):
+        self.limits = limits
+        self._buckets = {}
+
+    async def wait(self, kind, key=None):
+        route = (kind, key)
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            bucket = self._buckets[route] = TokenBucket(*self.limits[kind])
+        await bucket.acquire()
+
+
+# ===============================
+# PIPELINE
+# ===============================
+# Three stages with their own queues, so one slow route never holds up the
+# others: announce workers post channel welcomes (and fan each join out),
+# role workers grant the auto role, and a single DM worker drains the
+# global DM bucket. Burst coalescing is decided at submit time, from join
+# arrival rather than from when a worker got round to the member.
+class WelcomePipeline:
+    def __init__(self, logo_url, workers=WORKERS, queue_size=QUEUE_SIZE):
+        self.logo_url = logo_url
+        self.worker_count = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.role_queue = asyncio.Queue(maxsize=queue_size)
+        self.dm_queue = asyncio.Queue(maxsize=queue_size)
+        self.limiter = RouteLimiter()
+        self._workers = []
+        self._recent = defaultdict(deque)   # channel id -> recent join times
+        self._burst_until = {}              # channel id -> batch joins until
+        self._batches = {}                  # channel id -> members waiting
+        self._flushers = set()
+
+        self.processed = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.batched_messages = 0
+        self.batched_members = 0
+        self.roles_granted = 0
+        self.dms_sent = 0
+
+    def start(self):
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.worker_count)
+        ] + [
+            asyncio.create_task(self._role_worker()) for _ in range(self.worker_count)
+        ] + [
+            # DMs share one global bucket; more workers would only queue on it
+            asyncio.create_task(self._dm_worker())
+        ]
+
+    async def stop(self):
+        for task in self._workers + list(self._flushers):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._flushers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, member, settings):
+        now = time.monotonic()
+        batched = self._is_burst(settings.get("welcome_channel"), now)
+        try:
+            self.queue.put_nowait((member, settings, now, batched))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def _is_burst(self, channel_id, now):
+        if not channel_id:
+            return False
+        recent = self._recent[channel_id]
+        recent.append(now)
+        while recent and now - recent[0] > BURST_WINDOW:
+            recent.popleft()
+        if len(recent) > BURST_THRESHOLD:
+            self._burst_until[channel_id] = now + BURST_WINDOW
+        return now < self._burst_until.get(channel_id, 0)
+
+    def _hand_off(self, queue, item):
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    # ---------- workers ----------
+    async def _worker(self):
+        while True:
+            member, settings, enqueued, batched = await self.queue.get()
+            lag = time.monotonic() - enqueued
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            try:
+                if settings.get("welcome_role"):
+                    self._hand_off(self.role_queue, (member, settings["welcome_role"]))
+                self._hand_off(self.dm_queue, (member, settings["welcome_message"]))
+
+                channel = member.guild.get_channel(settings["welcome_channel"])
+                if channel:
+                    await self._announce(channel, member, settings["welcome_message"], batched)
+            except Exception as e:
+                print("Welcome error:", e)
+            finally:
+                self.processed += 1
+                self.queue.task_done()
+
+    async def _role_worker(self):
+        while True:
+            member, role_id = await self.role_queue.get()
+            try:
+                role = member.guild.get_role(role_id)
+                if role:
+                    await self.limiter.wait("roles", member.guild.id)
+                    await member.add_roles(role)
+                    self.roles_granted += 1
+            except discord.HTTPException:
+                pass
+            except Exception as e:
+                print("Welcome role error:", e)
+            finally:
+                self.role_queue.task_done()
+
+    async def _dm_worker(self):
+        while True:
+            member, message = await self.dm_queue.get()
+            try:
+                await self.limiter.wait("dm")
+                await member.send(message.format(user=member.name, server=member.guild.name))
+                self.dms_sent += 1
+            except discord.HTTPException:
+                pass
+            except Exception as e:
+                print("Welcome DM error:", e)
+            finally:
+                self.dm_queue.task_done()
+
+    # ---------- channel welcomes ----------
+    async def _announce(self, channel, member, message, batched):
+        if not batched:
+            await self.limiter.wait("channel", channel.id)
+            await channel.send(content=member.mention, embed=self._single_embed(member, message))
+            return
+
+        # burst: collect everyone joining in the next window into one message
+        batch = self._batches.get(channel.id)
+        if batch is None:
+            batch = self._batches[channel.id] = []
+            task = asyncio.create_task(self._flush_batch(channel, message))
+            self._flushers.add(task)
+            task.add_done_callback(self._flushers.discard)
+        batch.append(member)
+
+    async def _flush_batch(self, channel, message):
+        await asyncio.sleep(BURST_WINDOW)
+        members = self._batches.pop(channel.id, [])
+
+        for i in range(0, len(members), BATCH_MAX):
+            chunk = members[i:i + BATCH_MAX]
+            await self.limiter.wait("channel", channel.id)
+            try:
+                await channel.send(
+                    content=" ".join(m.mention for m in chunk),
+                    embed=self._batch_embed(chunk, message)
+                )
+            except Exception as e:
+                # HTTP errors or a bad {placeholder}; the other chunks still go out
+                print("Welcome batch error:", e)
+                continue
+            self.batched_messages += 1
+            self.batched_members += len(chunk)
+
+    def _single_embed(self, member, message):
+        embed = discord.Embed(
+            title="🎉 Welcome!",
+            description=message.format(
+                user=member.name,
+                server=member.guild.name
+            ),
+            color=discord.Color.gold()
+        )
+
+        embed.set_thumbnail(url=member.display_avatar.url)
+        embed.set_image(url=self.logo_url)
+        embed.set_footer(text=f"Member #{member.guild.member_count}")
+        return embed
+
+    def _batch_embed(self, members, message):
+        guild = members[0].guild
+        embed = discord.Embed(
+            title="🎉 Welcome!",
+            description=message.format(
+                user=", ".join(m.name for m in members),
+                server=guild.name
+            ),
+            color=discord.Color.gold()
+        )
+
+        embed.set_image(url=self.logo_url)
+        embed.set_footer(text=f"{len(members)} new members • Member #{guild.member_count}")
+        return embed
+
+    # ---------- metrics ----------
+    def stats(self):
+        return {
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "role_depth": self.role_queue.qsize(),
+            "dm_depth": self.dm_queue.qsize(),
+            "roles_granted": self.roles_granted,
+            "dms_sent": self.dms_sent,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "avg_lag_ms": round(self.total_lag * 1000 / self.processed, 1) if self.processed else 0.0,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "batched_messages": self.batched_messages,
+            "batched_members": self.batched_members
+        }
@@ -0,0 +1,95 @@
+from utils import supabase_db as db
+import asyncio
+
+# ===============================
+# CONFIG
+# ===============================
+FLUSH_SIZE = 500        # flush early once this many members have pending XP
+MAX_CACHED = 50_000     # drop clean entries past this many cached members
+
+
+# ===============================
+# WRITE-BEHIND XP BUFFER
+# ===============================
+# Keeps the current xp/level of every active member in memory, keyed by
+# (guild_id, user_id). Messages only touch memory; dirty entries are written
+# back to `levels` in one bulk upsert by flush().
+class XPBuffer:
+    def __init__(self, flush_size=FLUSH_SIZE, max_cached=MAX_CACHED):
+        self.flush_size = flush_size
+        self.max_cached = max_cached
+        self.entries = {}
+        self.dirty = set()
+        self._loading = {}
+        self._flush_lock = asyncio.Lock()
+
+    async def get(self, guild_id, user_id):
+        key = (guild_id, user_id)
+        entry = self.entries.get(key)
+        if entry is not None:
+            return entry
+
+        # one DB read per member, shared by concurrent messages
+        pending = self._loading.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(db.get_level(guild_id, user_id))
+            self._loading[key] = pending
+            try:
+                row = await pending
+            finally:
+                self._loading.pop(key, None)
+        else:
+            row = await pending
+
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = {"xp": row["xp"], "level": row["level"]} if row else {"xp": 0, "level": 1}
+            self.entries[key] = entry
+        return entry
+
+    async def add_xp(self, guild_id, user_id, amount):
+        entry = await self.get(guild_id, user_id)
+
+        entry["xp"] += amount
+        leveled_up = False
+        if entry["xp"] >= entry["level"] * 100:
+            entry["level"] += 1
+            leveled_up = True
+
+        self.dirty.add((guild_id, user_id))
+        return entry["xp"], entry["level"], leveled_up
+
+    @property
+    def should_flush(self):
+        return len(self.dirty) >= self.flush_size
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.dirty:
+                return 0
+
+            keys, self.dirty = self.dirty, set()
+            rows = [
+                {
+                    "guild_id": guild_id,
+                    "user_id": user_id,
+                    "xp": self.entries[(guild_id, user_id)]["xp"],
+                    "level": self.entries[(guild_id, user_id)]["level"]
+                }
+                for guild_id, user_id in keys
+            ]
+
+            written = False
+            try:
+                await db.upsert_levels(rows)
+                written = True
+            finally:
+                if not written:
+                    # failed or cancelled: keep the XP for the next flush
+                    self.dirty |= keys
+
+            if len(self.entries) > self.max_cached:
+                self.entries = {
+                    k: v for k, v in self.entries.items() if k in self.dirty
+                }
+            return len(rows)
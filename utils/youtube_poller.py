@@ -0,0 +1,87 @@
+from collections import defaultdict
+import aiohttp, asyncio, os, re
+
+# ===============================
+# CONFIG
+# ===============================
+# the public uploads feed costs no API quota and honours ETag/If-Modified-Since
+FEED_URL = os.getenv("YOUTUBE_FEED_URL", "https://www.youtube.com/feeds/videos.xml")
+CONCURRENCY = int(os.getenv("YOUTUBE_CONCURRENCY", "50"))
+TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# entries are newest first, so the first videoId is the latest upload
+VIDEO_ID_RE = re.compile(r"<yt:videoId>([^<]+)</yt:videoId>")
+
+
+# ===============================
+# POLLER
+# ===============================
+class YouTubePoller:
+    def __init__(self, session, feed_url=FEED_URL, concurrency=CONCURRENCY):
+        self.session = session
+        self.feed_url = feed_url
+        self._slots = asyncio.Semaphore(concurrency)
+        self._validators = {}   # channel -> (etag, last-modified)
+        self._latest = {}       # channel -> latest video id seen
+
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    async def fetch_latest(self, channel_id):
+        headers = {}
+        etag, modified = self._validators.get(channel_id, (None, None))
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+
+        async with self._slots:
+            self.requests += 1
+            try:
+                async with self.session.get(
+                    self.feed_url,
+                    params={"channel_id": channel_id},
+                    headers=headers,
+                    timeout=TIMEOUT
+                ) as r:
+                    if r.status == 304:
+                        self.not_modified += 1
+                        return self._latest.get(channel_id)
+                    if r.status != 200:
+                        self.errors += 1
+                        return None
+                    body = await r.text()
+                    validators = (r.headers.get("ETag"), r.headers.get("Last-Modified"))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.errors += 1
+                return None
+
+        match = VIDEO_ID_RE.search(body)
+        if not match:
+            return None
+
+        self._validators[channel_id] = validators
+        self._latest[channel_id] = match.group(1)
+        return match.group(1)
+
+    async def run_cycle(self, rows):
+        # one fetch per distinct channel, fanned out to every subscribed guild
+        by_channel = defaultdict(list)
+        for row in rows:
+            by_channel[row["youtube_channel"]].append(row)
+
+        channels = list(by_channel)
+        latest = await asyncio.gather(*(self.fetch_latest(ch) for ch in channels))
+
+        notifications = []
+        changed = {}
+        for channel, video_id in zip(channels, latest):
+            if not video_id:
+                continue
+            for row in by_channel[channel]:
+                if video_id != row["last_video"]:
+                    notifications.append((row, video_id))
+                    changed[channel] = video_id
+
+        return notifications, changed